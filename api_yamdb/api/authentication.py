@@ -0,0 +1,107 @@
+"""
+Аутентификация по JWT без загрузки пользователя на каждый запрос.
+
+RoleAccessToken записывает в токен username, role, is_superuser и
+User.token_version. StatelessJWTAuthentication собирает из этих claims
+объект User; остальные поля Django подгружает из базы при первом
+обращении к ним. Версия токенов пользователя кэшируется в памяти процесса
+на JWT_TOKEN_VERSION_TTL секунд. Если она изменилась (смена роли, имени
+или блокировка), токен проверяется как обычно: с загрузкой пользователя
+и проверкой is_active.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+USER_CLAIMS = ('username', 'role', 'is_superuser')
+VERSION_CLAIM = 'token_version'
+# При переполнении кэш версий очищается целиком.
+VERSION_CACHE_SIZE = 10000
+
+
+class RoleAccessToken(AccessToken):
+    """Access-токен с ролью пользователя и версией его токенов."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class TokenVersionCache:
+    """Версии токенов активных пользователей с коротким временем жизни."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            version, loaded = self._versions.get(user_id, (None, None))
+        ttl = settings.JWT_TOKEN_VERSION_TTL
+        if loaded is not None and now - loaded < ttl:
+            return version
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        with self._lock:
+            if len(self._versions) >= VERSION_CACHE_SIZE:
+                self._versions.clear()
+            self._versions[user_id] = (version, now)
+        return version
+
+    def discard(self, user_id):
+        with self._lock:
+            self._versions.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+token_versions = TokenVersionCache()
+
+
+def user_from_claims(token):
+    """User из claims токена; остальные поля отложены (deferred)."""
+    values = {
+        User._meta.pk.attname: token[api_settings.USER_ID_CLAIM],
+        **{claim: token[claim] for claim in USER_CLAIMS},
+    }
+    field_names = [field.attname for field in User._meta.concrete_fields
+                   if field.attname in values]
+    return User.from_db(
+        router.db_for_read(User), field_names,
+        [values[name] for name in field_names]
+    )
+
+
+def load_deferred_fields(user):
+    """Загружает отложенные поля пользователя одним запросом."""
+    deferred = user.get_deferred_fields()
+    if deferred:
+        user.refresh_from_db(fields=deferred)
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication без запроса пользователя для актуальных токенов."""
+
+    def get_user(self, validated_token):
+        claims = (api_settings.USER_ID_CLAIM, VERSION_CLAIM) + USER_CLAIMS
+        if any(claim not in validated_token for claim in claims):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if token_versions.get(user_id) != validated_token[VERSION_CLAIM]:
+            return super().get_user(validated_token)
+        return user_from_claims(validated_token)
@@ -0,0 +1,178 @@
+"""
+Кэш ответов и условные GET-запросы с инвалидацией по версиям.
+
+У каждого пространства имен (categories, genres, titles, отзывы
+произведения, комментарии отзыва) есть версия — время последнего
+изменения. Она входит в ключ кэша, ETag и Last-Modified. Сигналы
+моделей (api/signals.py) меняют версию после фиксации транзакции, после
+чего старые ответы больше не читаются и вытесняются по таймауту.
+"""
+import hashlib
+import math
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{}'
+# Входит во все ответы, меняется после массовой загрузки данных.
+ALL_NAMESPACE = 'all'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def new_version(previous=None):
+    """Версия — время изменения в микросекундах, строго возрастает."""
+    version = time.time_ns() // 1000
+    if previous is not None and version <= previous:
+        version = previous + 1
+    return version
+
+
+def get_versions(*namespaces):
+    """Возвращает версии пространств имен, создавая недостающие."""
+    cache = get_cache()
+    keys = {VERSION_KEY.format(namespace): namespace
+            for namespace in namespaces}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        version = new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+        versions[key] = version
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_versions(*namespaces):
+    """Делает устаревшими закэшированные ответы пространств имен.
+
+    Версия меняется после фиксации текущей транзакции: иначе запрос,
+    прочитавший данные до фиксации, сохранил бы их под новой версией.
+    """
+    transaction.on_commit(lambda: set_new_versions(namespaces))
+
+
+def set_new_versions(namespaces):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(namespace) for namespace in namespaces]
+    previous = cache.get_many(keys)
+    cache.set_many(
+        {key: new_version(previous.get(key)) for key in keys},
+        timeout=None
+    )
+
+
+def bump_all_versions():
+    """Сбрасывает все ответы, например после import_csv_to_db."""
+    bump_versions(ALL_NAMESPACE)
+
+
+def normalize_query(query_params):
+    """Сортирует параметры запроса, чтобы ?a=1&b=2 и ?b=2&a=1 совпадали."""
+    return urlencode(sorted(
+        (key, value)
+        for key in query_params
+        for value in query_params.getlist(key)
+    ))
+
+
+def request_fingerprint(request, view_name, versions):
+    """Хэш представления: вьюсет, путь, параметры, формат и версии."""
+    parts = [
+        view_name,
+        request.path,
+        normalize_query(request.query_params),
+        request.accepted_renderer.media_type,
+    ] + [f'{namespace}={version}'
+         for namespace, version in sorted(versions.items())]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+class VersionedViewMixin:
+    """Версии пространств имен, от которых зависят ответы вьюсета."""
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def get_cache_versions(self):
+        """Читает версии один раз за запрос, до чтения данных из базы."""
+        if not hasattr(self, '_cache_versions'):
+            self._cache_versions = get_versions(
+                ALL_NAMESPACE, *self.get_cache_namespaces())
+        return self._cache_versions
+
+    def get_fingerprint(self):
+        return request_fingerprint(
+            self.request, type(self).__name__, self.get_cache_versions())
+
+
+class CachedListMixin(VersionedViewMixin):
+    """
+    Кэширует данные ответа list() для вьюсета.
+
+    Ответы не зависят от пользователя, поэтому кэш общий. Ключ
+    включает нормализованную строку запроса (фильтры и пагинацию)
+    и версии пространств имен из cache_namespaces.
+    """
+
+    def list(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = f'api:response:{type(self).__name__}:{self.get_fingerprint()}'
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
+
+class ConditionalListMixin(VersionedViewMixin):
+    """
+    Условные GET-запросы для list().
+
+    ETag и Last-Modified вычисляются по версиям пространств имен без
+    запросов к базе, поэтому на совпавший If-None-Match или
+    If-Modified-Since ответ 304 отдается без сериализации.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = f'W/"{self.get_fingerprint()}"'
+        last_modified = math.ceil(
+            max(self.get_cache_versions().values()) / 10 ** 6)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, max_age=0)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Условные GET-запросы для list() и retrieve()."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
@@ -1,17 +1,40 @@
+from django.db.models import Count
 from django_filters import rest_framework as filters
-from reviews.models import Title
+from rest_framework.filters import BaseFilterBackend
+from reviews.models import GenreTitle, Title
+
+from .search import search
+
+
+def split_slugs(value):
+    """Разбирает `?genre=drama,comedy` в список slug без пустых значений."""
+    return list(dict.fromkeys(
+        slug.strip() for slug in value.split(',') if slug.strip()))
 
 
 class TitleFilter(filters.FilterSet):
-    """Фильтр выборки произведений по определенным полям."""
+    """Фильтр выборки произведений по определенным полям.
 
-    category = filters.CharFilter(
+    category и genre сравнивают slug точно (по уникальному индексу)
+    и принимают несколько значений через запятую. Для genre режим
+    genre_match=any|all задает, нужен любой из жанров или все сразу.
+    Поиск по подстроке slug включается параметрами *_contains.
+    """
+
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')),
+        method='filter_genre_match'
+    )
+    category_contains = filters.CharFilter(
         field_name='category__slug',
         lookup_expr='icontains'
     )
-    genre = filters.CharFilter(
+    genre_contains = filters.CharFilter(
         field_name='genre__slug',
-        lookup_expr='icontains'
+        lookup_expr='icontains',
+        distinct=True
     )
     name = filters.CharFilter(
         field_name='name',
@@ -25,3 +48,37 @@ class TitleFilter(filters.FilterSet):
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_category(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        return queryset.filter(category__slug__in=slugs)
+
+    def filter_genre(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        if self.form.cleaned_data.get('genre_match') == 'all':
+            matched = GenreTitle.objects.filter(
+                genre__slug__in=slugs
+            ).order_by().values('title').annotate(
+                total=Count('genre')
+            ).filter(total=len(slugs)).values('title')
+            return queryset.filter(pk__in=matched)
+        return queryset.filter(genre__slug__in=slugs).distinct()
+
+    def filter_genre_match(self, queryset, name, value):
+        """Режим учитывается в filter_genre."""
+        return queryset
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Фильтр ?search= по полнотекстовому индексу из api/search.py."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param)
+        if not text:
+            return queryset
+        return search(queryset, view.search_index, text)
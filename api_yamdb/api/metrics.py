@@ -0,0 +1,268 @@
+"""
+Метрики в формате Prometheus без внешних сервисов.
+
+Каждый процесс копит значения в памяти и периодически атомарно
+записывает их в свой файл в METRICS_DIR. Эндпоинт /api/metrics
+складывает файлы всех процессов, поэтому при нескольких воркерах
+gunicorn метрики собираются со всех. Без METRICS_DIR видны только
+метрики текущего процесса.
+
+Файл процесса называется worker-<pid>-<время запуска>.json. При сборе
+файлы завершившихся процессов удаляются, а для PID, доставшегося новому
+процессу, остается только файл с самым поздним временем запуска.
+"""
+import atexit
+import glob
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import suppress
+
+from django.conf import settings
+from django.db.models import Count
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+METRICS = {
+    'yamdb_http_requests_total': (
+        COUNTER, 'Обработанные HTTP-запросы.'),
+    'yamdb_http_errors_total': (
+        COUNTER, 'HTTP-запросы, завершившиеся ошибкой сервера.'),
+    'yamdb_http_request_duration_seconds': (
+        HISTOGRAM, 'Время обработки HTTP-запроса.'),
+    'yamdb_db_queries_total': (
+        COUNTER, 'SQL-запросы, выполненные при обработке HTTP-запросов.'),
+    'yamdb_db_query_duration_seconds_total': (
+        COUNTER, 'Суммарное время SQL-запросов.'),
+    'yamdb_email_outbox_messages': (
+        GAUGE, 'Письма в очереди EmailOutbox по статусам.'),
+    'yamdb_import_running': (
+        GAUGE, 'Выполняется ли сейчас import_csv_to_db.'),
+    'yamdb_import_rows': (
+        GAUGE, 'Строки, обработанные import_csv_to_db, по таблицам.'),
+    'yamdb_import_rows_per_second': (
+        GAUGE, 'Скорость загрузки последней таблицы import_csv_to_db.'),
+    'yamdb_import_updated_timestamp_seconds': (
+        GAUGE, 'Время последнего отчета import_csv_to_db.'),
+}
+
+WORKER_FILE_RE = re.compile(r'^worker-(\d+)(?:-(\d+))?\.json$')
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def write_samples(name, samples):
+    """Атомарно записывает значения в файл METRICS_DIR/<name>.json."""
+    directory = settings.METRICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix=f'.{name}-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+        json.dump([[metric, list(labels), value]
+                   for (metric, labels), value in samples.items()], file)
+    os.replace(path, os.path.join(directory, f'{name}.json'))
+
+
+def read_samples(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return {
+        (metric, tuple(map(tuple, labels))): value
+        for metric, labels, value in data
+    }
+
+
+def process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_file(path):
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def prune_worker_files(directory):
+    """Удаляет файлы процессов, которые уже завершились."""
+    latest = {}
+    for path in glob.glob(os.path.join(directory, 'worker-*.json')):
+        match = WORKER_FILE_RE.match(os.path.basename(path))
+        if match is None:
+            continue
+        pid, started = int(match.group(1)), int(match.group(2) or 0)
+        if not process_exists(pid):
+            remove_file(path)
+            continue
+        previous = latest.get(pid)
+        if previous is not None:
+            if previous[0] > started:
+                remove_file(path)
+                continue
+            remove_file(previous[1])
+        latest[pid] = (started, path)
+
+
+class MetricsRegistry:
+    """Значения метрик текущего процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.started = time.time_ns() // 1000
+        self.samples = defaultdict(float)
+        self.flushed = 0.0
+
+    def check_fork(self):
+        """После fork значения родителя остаются в его собственном файле."""
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.check_fork()
+            self.samples[(name, label_key(labels))] += value
+
+    def observe(self, name, labels, value):
+        """Добавляет наблюдение в гистограмму с накопительными корзинами."""
+        with self.lock:
+            self.check_fork()
+            for bound in DURATION_BUCKETS:
+                key = label_key({**labels, 'le': format_bound(bound)})
+                self.samples[(f'{name}_bucket', key)] += int(value <= bound)
+            self.samples[(f'{name}_sum', label_key(labels))] += value
+            self.samples[(f'{name}_count', label_key(labels))] += 1
+
+    def flush(self, force=False):
+        """Записывает значения в файл процесса не чаще интервала."""
+        if not settings.METRICS_DIR:
+            return
+        with self.lock:
+            self.check_fork()
+            now = time.monotonic()
+            if not force and now - self.flushed < (
+                    settings.METRICS_FLUSH_INTERVAL):
+                return
+            self.flushed = now
+            samples = dict(self.samples)
+        write_samples(f'worker-{self.pid}-{self.started}', samples)
+
+    def snapshot(self):
+        with self.lock:
+            self.check_fork()
+            return dict(self.samples)
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush, force=True)
+
+
+def set_import_progress(table, counts, rate, running=True):
+    """Публикует прогресс import_csv_to_db для /api/metrics."""
+    if not settings.METRICS_DIR:
+        return
+    samples = {
+        ('yamdb_import_running', ()): int(running),
+        ('yamdb_import_rows_per_second', (('table', table),)): rate,
+        ('yamdb_import_updated_timestamp_seconds', ()): time.time(),
+    }
+    for result, value in counts.items():
+        key = label_key({'table': table, 'result': result})
+        samples[('yamdb_import_rows', key)] = value
+    path = os.path.join(settings.METRICS_DIR, 'import.json')
+    previous = read_samples(path)
+    previous.update(samples)
+    write_samples('import', previous)
+
+
+def outbox_samples():
+    from reviews.models import OUTBOX_STATUSES, EmailOutbox
+
+    counts = dict(
+        EmailOutbox.objects.order_by().values_list(
+            'status').annotate(total=Count('pk'))
+    )
+    return {
+        ('yamdb_email_outbox_messages', (('status', status),)):
+            counts.get(status, 0)
+        for status, _ in OUTBOX_STATUSES
+    }
+
+
+def collect():
+    """Складывает значения всех процессов и добавляет gauge из базы."""
+    if settings.METRICS_DIR:
+        registry.flush(force=True)
+        prune_worker_files(settings.METRICS_DIR)
+        samples = defaultdict(float)
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            for key, value in read_samples(path).items():
+                samples[key] += value
+    else:
+        samples = registry.snapshot()
+    samples.update(outbox_samples())
+    return samples
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace(
+        '\n', r'\n').replace('"', r'\"')
+
+
+def format_number(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(samples):
+    """Возвращает значения в текстовом формате Prometheus."""
+    grouped = defaultdict(list)
+    for (name, labels), value in samples.items():
+        for suffix in ('_bucket', '_sum', '_count', ''):
+            base = name[:-len(suffix)] if suffix else name
+            if name.endswith(suffix) and base in METRICS:
+                grouped[base].append((name, labels, value))
+                break
+    lines = []
+    for base, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {base} {description}')
+        lines.append(f'# TYPE {base} {kind}')
+        for name, labels, value in sorted(
+                grouped[base], key=lambda sample: sample_order(*sample)):
+            label_text = ','.join(
+                f'{key}="{escape(label)}"' for key, label in labels)
+            if label_text:
+                label_text = f'{{{label_text}}}'
+            lines.append(f'{name}{label_text} {format_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def sample_order(name, labels, value):
+    """Сортирует корзины гистограммы по возрастанию границы."""
+    labels = dict(labels)
+    bound = labels.pop('le', None)
+    bound = float(bound) if bound is not None else 0.0
+    return sorted(labels.items()), name, bound
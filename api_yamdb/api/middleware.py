@@ -0,0 +1,165 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .metrics import registry
+
+logger = logging.getLogger('api.timing')
+slow_logger = logging.getLogger('api.timing.slow')
+
+MAX_RECORDED_QUERIES = 200
+
+
+class QueryRecorder:
+    """Считает SQL-запросы и их время через connection.execute_wrapper."""
+
+    def __init__(self, max_queries=MAX_RECORDED_QUERIES):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+        self.max_queries = max_queries
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if len(self.queries) < self.max_queries:
+                self.queries.append((sql, params, elapsed))
+
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 3)
+
+
+class RequestTimingMiddleware:
+    """
+    Замеряет для каждого запроса число и время SQL-запросов, время
+    работы view, serializer.data (входит во view, см.
+    TimedListMixin) и рендеринга ответа, размер ответа.
+
+    Результаты отдаются в заголовке Server-Timing и пишутся в лог
+    `api.timing` строкой JSON. Запросы дольше REQUEST_TIMING_SLOW_MS
+    вместе с их SQL пишутся в лог `api.timing.slow`.
+    Включается настройкой REQUEST_TIMING_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.timing = {}
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        total = finished - started
+        view_started = request.timing.get('view_started', started)
+        view_finished = request.timing.get('view_finished', finished)
+        timings = {
+            'db': recorder.duration,
+            'view': view_finished - view_started,
+            'serializer': request.timing.get('serializer', 0.0),
+            'render': finished - view_finished,
+            'total': total,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={milliseconds(value)}'
+            + (f';desc="{recorder.count} queries"' if name == 'db' else '')
+            for name, value in timings.items()
+        )
+
+        record = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'queries': recorder.count,
+            'response_bytes': (
+                None if response.streaming else len(response.content)),
+        }
+        record.update(
+            (f'{name}_ms', milliseconds(value))
+            for name, value in timings.items()
+        )
+        logger.info(json.dumps(record, ensure_ascii=False))
+        if total * 1000 >= settings.REQUEST_TIMING_SLOW_MS:
+            record['sql'] = [
+                {'sql': sql, 'params': repr(params),
+                 'ms': milliseconds(elapsed)}
+                for sql, params, elapsed in recorder.queries
+            ]
+            slow_logger.warning(json.dumps(record, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timing['view_started'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """
+        Ответы DRF рендерятся после выхода из view, поэтому время
+        рендеринга считается от этого момента.
+        """
+        request.timing['view_finished'] = time.perf_counter()
+        return response
+
+
+def view_label(view_func, request):
+    """Возвращает метку вида `TitleViewSet.list` для метрик."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    method = request.method.lower()
+    action = (getattr(view_func, 'actions', None) or {}).get(method, method)
+    return f'{cls.__name__}.{action}'
+
+
+class MetricsMiddleware:
+    """
+    Считает запросы, ошибки, SQL-запросы и время ответа по вьюсетам
+    и действиям для эндпоинта /api/metrics.
+    Включается настройкой METRICS_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.metrics_view = 'unresolved'
+        recorder = QueryRecorder(max_queries=0)
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        labels = {'view': request.metrics_view}
+        registry.inc('yamdb_http_requests_total', {
+            **labels,
+            'method': request.method,
+            'status': str(response.status_code),
+        })
+        if response.status_code >= 500:
+            registry.inc('yamdb_http_errors_total', labels)
+        registry.observe('yamdb_http_request_duration_seconds', labels,
+                         elapsed)
+        registry.inc('yamdb_db_queries_total', labels, recorder.count)
+        registry.inc('yamdb_db_query_duration_seconds_total', labels,
+                     recorder.duration)
+        registry.flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_label(view_func, request)
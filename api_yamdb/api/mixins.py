@@ -1,10 +1,50 @@
+import time
+
+from django.shortcuts import get_object_or_404
 from rest_framework import filters, mixins, viewsets
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from reviews.models import Review, Title
 
 from .permissions import IsAdmin, IsAnonymReadOnly
 
 
+class TimedListMixin:
+    """
+    list() с замером времени serializer.data для RequestTimingMiddleware
+    (request.timing['serializer']).
+    """
+
+    def get_serializer_data(self, serializer):
+        started = time.perf_counter()
+        data = serializer.data
+        timing = getattr(self.request, 'timing', None)
+        if timing is not None:
+            timing['serializer'] = timing.get('serializer', 0) + (
+                time.perf_counter() - started)
+        return data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(
+                self.get_serializer_data(serializer))
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(self.get_serializer_data(serializer))
+
+
+class TimedListRetrieveMixin(TimedListMixin):
+    """list() и retrieve() с замером времени serializer.data."""
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        return Response(self.get_serializer_data(serializer))
+
+
 class CreateRetrieveDestroyViewSet(
+    TimedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -15,3 +55,37 @@ class CreateRetrieveDestroyViewSet(
     pagination_class = LimitOffsetPagination
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+
+
+class NestedParentMixin:
+    """
+    Загружает Title и Review из title_id/review_id адреса один раз за
+    запрос и передает их сериализаторам в context['title'] и
+    context['review'].
+    """
+    parent_context = ()
+
+    def get_title(self):
+        """Получаем объект класса Title по title_id."""
+        if 'review_id' in self.kwargs:
+            return self.get_review().title
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id'))
+        return self._title
+
+    def get_review(self):
+        """Получаем Review вместе с его Title одним запросом."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title'),
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id')
+            )
+        return self._review
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        for name in self.parent_context:
+            context[name] = getattr(self, f'get_{name}')()
+        return context
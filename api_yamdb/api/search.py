@@ -0,0 +1,104 @@
+"""
+Полнотекстовый поиск по произведениям и отзывам.
+
+На SQLite используются таблицы FTS5 и ранжирование bm25, на PostgreSQL
+— GIN-индексы по to_tsvector и ts_rank (миграция reviews 0009).
+На остальных базах поиск сводится к icontains без ранжирования.
+"""
+import re
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from reviews.models import Review, Title
+
+SearchIndex = namedtuple('SearchIndex', ['model', 'fields', 'weights'])
+
+SEARCH_INDEXES = {
+    'titles': SearchIndex(Title, ('name', 'description'), (10.0, 1.0)),
+    'reviews': SearchIndex(Review, ('text',), (1.0,)),
+}
+
+# Выражения совпадают с GIN-индексами миграции reviews 0009.
+POSTGRES_VECTORS = {
+    'titles': (
+        "setweight(to_tsvector('simple', coalesce({table}.name, '')), 'A')"
+        " || setweight(to_tsvector('simple', "
+        "coalesce({table}.description, '')), 'B')"
+    ),
+    'reviews': "to_tsvector('simple', {table}.text)",
+}
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_TOKENS = 10
+
+
+def get_tokens(text):
+    """Слова запроса без операторов и спецсимволов полнотекстового поиска."""
+    return TOKEN_RE.findall(text or '')[:MAX_TOKENS]
+
+
+class SqliteSearchBackend:
+
+    def search(self, queryset, name, tokens):
+        # Каждое слово берется в кавычки, чтобы AND, OR, NEAR и * из
+        # пользовательского ввода не разбирались как синтаксис FTS5.
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        index = SEARCH_INDEXES[name]
+        table = connection.ops.quote_name(index.model._meta.db_table)
+        fts = connection.ops.quote_name(f'{index.model._meta.db_table}_fts')
+        weights = ', '.join(map(str, index.weights))
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (query,)
+        )).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({fts}, {weights}) FROM {fts} '
+            f'WHERE {fts} MATCH %s AND {fts}.rowid = {table}.id',
+            (query,), output_field=FloatField()
+        ))
+
+
+class PostgresSearchBackend:
+
+    def search(self, queryset, name, tokens):
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        index = SEARCH_INDEXES[name]
+        vector = POSTGRES_VECTORS[name].format(
+            table=connection.ops.quote_name(index.model._meta.db_table))
+        return queryset.annotate(search_match=RawSQL(
+            f"{vector} @@ to_tsquery('simple', %s)", (query,),
+            output_field=BooleanField()
+        )).filter(search_match=True).annotate(search_rank=RawSQL(
+            f"ts_rank({vector}, to_tsquery('simple', %s))", (query,),
+            output_field=FloatField()
+        ))
+
+
+class FallbackSearchBackend:
+
+    def search(self, queryset, name, tokens):
+        fields = SEARCH_INDEXES[name].fields
+        for token in tokens:
+            queryset = queryset.filter(reduce(or_, (
+                Q(**{f'{field}__icontains': token}) for field in fields)))
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField()))
+
+
+def get_backend():
+    if connection.vendor == 'sqlite':
+        return SqliteSearchBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return FallbackSearchBackend()
+
+
+def search(queryset, name, text):
+    """Отбирает объекты по запросу и сортирует их по релевантности."""
+    tokens = get_tokens(text)
+    if not tokens:
+        return queryset.none()
+    return get_backend().search(queryset, name, tokens).order_by(
+        '-search_rank', '-pk')
@@ -1,9 +1,34 @@
+from django.db import IntegrityError
 from django.db.models import Q
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
 
+def get_expand_fields(request):
+    """Возвращает имена полей, развернутых параметром ?expand=."""
+    if request is None:
+        return set()
+    expand = request.query_params.get('expand', '')
+    return {name.strip() for name in expand.split(',') if name.strip()}
+
+
+class ExpandableFieldsMixin:
+    """
+    Подменяет компактные поля сериализатора вложенными
+    представлениями, перечисленными в параметре ?expand=.
+    """
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = get_expand_fields(self.context.get('request'))
+        for name in expand & set(self.expandable_fields):
+            serializer_class, kwargs = self.expandable_fields[name]
+            fields[name] = serializer_class(**kwargs)
+        return fields
+
+
 class CategorySerializer(serializers.ModelSerializer):
     """Сериализатор для обьектов класса Category."""
     class Meta:
@@ -18,15 +43,50 @@ class GenreSerializer(serializers.ModelSerializer):
         exclude = ('id',)
 
 
-class TitleGETSerializer(serializers.ModelSerializer):
+class RatingStatsSerializer(serializers.Serializer):
+    """Число оценок, средняя, медиана и гистограмма оценок 1–10."""
+    count = serializers.IntegerField(read_only=True)
+    mean = serializers.FloatField(read_only=True)
+    median = serializers.FloatField(read_only=True)
+    histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True)
+
+
+class TitleGETSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для обьектов класса Title (GET)."""
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(
+        source='rating_count', read_only=True)
+
+    expandable_fields = {
+        'rating_stats': (RatingStatsSerializer, {'read_only': True}),
+    }
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'rating', 'review_count',
+                  'description', 'genre', 'category')
+
+
+class LeaderboardTitleSerializer(TitleGETSerializer):
+    """Сериализатор произведений для /titles/top/ и /titles/trending/."""
+    weighted_rating = serializers.FloatField(
+        source='leaderboard.weighted_rating', read_only=True)
+    recent_reviews = serializers.IntegerField(
+        source='leaderboard.recent_reviews', read_only=True)
+
+    class Meta(TitleGETSerializer.Meta):
+        fields = TitleGETSerializer.Meta.fields + (
+            'weighted_rating', 'recent_reviews')
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    """Параметры запроса к /titles/top/ и /titles/trending/."""
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
 
 
 class TitleSerializer(serializers.ModelSerializer):
@@ -112,20 +172,28 @@ class ReviewSerializer(serializers.ModelSerializer):
         default=serializers.CurrentUserDefault()
     )
 
-    def validate(self, data):
+    def create(self, validated_data):
         """Запрещает пользователю на одно произведение
-        оставлять более одного отзыва."""
-        request = self.context.get('request')
-        title = get_object_or_404(
-            Title, pk=self.context.get('view').kwargs.get('title_id'))
-        author = request.user
-        if Review.objects.filter(
-            author=author, title=title
-        ).exists():
-            raise serializers.ValidationError(
-                'На одно произведение пользователь может'
-                'оставить только один отзыв.')
-        return data
+        оставлять более одного отзыва.
+
+        Повтор отклоняет UniqueConstraint модели, поэтому одновременные
+        запросы не создадут двух отзывов. Review.save выполняется в
+        transaction.atomic, то есть внутри транзакции запроса — в точке
+        сохранения, и после ошибки транзакцию можно продолжать.
+        """
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author=validated_data['author'],
+                title=validated_data['title']
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'На одно произведение пользователь может'
+                    'оставить только один отзыв.']
+            })
 
     class Meta:
         model = Review
@@ -149,17 +217,43 @@ class ReadOnlyReviewSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Comment."""
-    review = serializers.SlugRelatedField(
-        slug_field='text',
+class SearchReviewSerializer(ReadOnlyReviewSerializer):
+    """Отзыв в результатах поиска, со ссылкой на произведение."""
+    title_id = serializers.IntegerField(read_only=True)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """Параметры запроса к /api/v1/search/."""
+    q = serializers.CharField(max_length=200)
+    type = serializers.ChoiceField(
+        choices=('titles', 'reviews'), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class CommentReviewSerializer(serializers.ModelSerializer):
+    """Краткое представление отзыва для ?expand=review у комментария."""
+    author = serializers.SlugRelatedField(
+        slug_field='username',
         read_only=True
     )
+
+    class Meta:
+        model = Review
+        fields = ('id', 'text', 'author', 'score', 'pub_date')
+
+
+class CommentSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    """Сериализатор для модели Comment."""
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
 
+    expandable_fields = {
+        'review': (CommentReviewSerializer, {'read_only': True}),
+    }
+
     class Meta:
         model = Comment
         fields = '__all__'
@@ -0,0 +1,100 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+from .authentication import token_versions
+from .cache import bump_versions
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    """Категории входят и в список категорий, и в список произведений."""
+    bump_versions('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    """Жанры входят и в список жанров, и в список произведений."""
+    bump_versions('genres', 'titles')
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def invalidate_titles(sender, **kwargs):
+    bump_versions('titles')
+
+
+@receiver(post_save, sender=Title)
+def invalidate_saved_title(sender, instance, **kwargs):
+    """Название произведения выводится и в его отзывах."""
+    bump_versions('titles', f'reviews:{instance.pk}')
+
+
+@receiver(post_delete, sender=Title)
+def invalidate_deleted_title(sender, instance, **kwargs):
+    """Отзывы удаленного произведения должны отдавать 404, а не 304."""
+    bump_versions('titles', f'reviews:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_versions('titles')
+
+
+@receiver(post_save, sender=Review)
+def invalidate_saved_review(sender, instance, created, **kwargs):
+    """
+    Сбрасывает отзывы произведения и комментарии отзыва (в них есть
+    ?expand=review), а список произведений — только если изменился
+    рейтинг.
+    """
+    previous = getattr(instance, '_previous_rating', None)
+    namespaces = [f'reviews:{instance.title_id}', f'comments:{instance.pk}']
+    if previous and previous[0] != instance.title_id:
+        namespaces.append(f'reviews:{previous[0]}')
+    if created or previous != (instance.title_id, instance.score):
+        namespaces.append('titles')
+    bump_versions(*namespaces)
+
+
+@receiver(post_delete, sender=Review)
+def invalidate_deleted_review(sender, instance, **kwargs):
+    bump_versions(
+        'titles', f'reviews:{instance.title_id}', f'comments:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, created=True, **kwargs):
+    """Новый или удаленный комментарий меняет и comment_count в списке
+    отзывов произведения."""
+    namespaces = [f'comments:{instance.review_id}']
+    if created:
+        if Comment.review.is_cached(instance):
+            title_id = instance.review.title_id
+        else:
+            title_id = Review.objects.filter(
+                pk=instance.review_id
+            ).values_list('title_id', flat=True).first()
+        if title_id is not None:
+            namespaces.append(f'reviews:{title_id}')
+    bump_versions(*namespaces)
+
+
+@receiver(post_save, sender=User)
+def invalidate_usernames(sender, instance, created, **kwargs):
+    """Имя пользователя выводится как автор отзывов и комментариев."""
+    previous = getattr(instance, '_previous_user', None)
+    if previous is not None and previous['username'] != instance.username:
+        bump_versions('usernames')
+
+
+@receiver(post_save, sender=User)
+def discard_token_version(sender, instance, **kwargs):
+    """Изменения пользователя сразу видны в этом процессе, в остальных —
+    через JWT_TOKEN_VERSION_TTL секунд."""
+    token_versions.discard(instance.pk)
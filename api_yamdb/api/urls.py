@@ -1,7 +1,7 @@
 from api.views import (CategoryViewSet, CommentViewSet,
                        CreateOrSignupUserViewSet, GenreViewSet,
-                       GetTokenViewSet, ReviewViewSet, TitleViewSet,
-                       UserViewSet)
+                       GetTokenViewSet, ReviewViewSet, SearchViewSet,
+                       TitleViewSet, UserViewSet, metrics)
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -10,6 +10,7 @@ router_v1.register('users', UserViewSet, basename='users')
 router_v1.register('categories', CategoryViewSet, basename='categories')
 router_v1.register('genres', GenreViewSet, basename='genres')
 router_v1.register('titles', TitleViewSet, basename='titles')
+router_v1.register('search', SearchViewSet, basename='search')
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews', ReviewViewSet,
     basename='review')
@@ -20,6 +21,7 @@ router_v1.register(
 
 
 urlpatterns = [
+    path('metrics', metrics, name='metrics'),
     path('v1/', include(router_v1.urls)),
     path('v1/auth/signup/',
          CreateOrSignupUserViewSet.as_view({'post': 'create'}),
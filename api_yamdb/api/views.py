@@ -1,44 +1,85 @@
-from api.filters import TitleFilter
-from api.mixins import CreateRetrieveDestroyViewSet
+from api.filters import FullTextSearchFilter, TitleFilter
+from api.mixins import (CreateRetrieveDestroyViewSet, NestedParentMixin,
+                        TimedListRetrieveMixin)
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db.models import Avg
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
+from django.utils.crypto import constant_time_compare
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, permissions, status, viewsets
+from rest_framework import (filters, generics, mixins, permissions, status,
+                            viewsets)
 from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, EmailOutbox, Genre, Review,
+                            Title, TitleRatingStats, User)
 
+from .authentication import RoleAccessToken, load_deferred_fields
+from .cache import (CachedListMixin, ConditionalGetMixin,
+                    ConditionalListMixin)
+from .metrics import collect, render
+from .pagination import KeysetPagination
 from .permissions import IsAdmin, IsAnonymReadOnly, IsAuthor, IsModerator
+from .search import search
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, GetTokenSerializer,
+                          LeaderboardQuerySerializer,
+                          LeaderboardTitleSerializer, RatingStatsSerializer,
                           ReadOnlyReviewSerializer, ReviewSerializer,
+                          SearchQuerySerializer, SearchReviewSerializer,
                           TitleGETSerializer, TitleSerializer,
-                          UserCreateSerializer, UserSerializer)
+                          UserCreateSerializer, UserSerializer,
+                          get_expand_fields)
 
 
 def send_confirmation_code(username, email, confirmation_code):
-    """Отправка письма с кодом подтверждения на указанный email"""
+    """Отправка письма с кодом подтверждения на указанный email.
+
+    При включенном EMAIL_OUTBOX_ENABLED письмо только ставится в очередь.
+    """
     context = {
         'username': username,
         'email': email,
         'confirmation_code': confirmation_code
     }
     message = render_to_string('send_email.txt', context)
+    if settings.EMAIL_OUTBOX_ENABLED:
+        EmailOutbox.objects.create(
+            subject='Ваш confirmation_code',
+            message=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient=email,
+        )
+        return
     send_mail(
         subject='Ваш confirmation_code',
         message=message,
-        from_email='YamDB@yandex.ru',
+        from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[email],
         fail_silently=False,
     )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+def metrics(request):
+    """Метрики в формате Prometheus, доступны только с METRICS_TOKEN.
+
+    Адрес клиента не проверяется: за nginx все запросы приходят
+    с 127.0.0.1.
+    """
+    token = settings.METRICS_TOKEN
+    if not (settings.METRICS_ENABLED and token and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')):
+        raise Http404
+    return HttpResponse(
+        render(collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+class UserViewSet(TimedListRetrieveMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с объектами класса User."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -53,7 +94,7 @@ class UserViewSet(viewsets.ModelViewSet):
                                 permissions.IsAuthenticated])
     def me(self, request):
         """Поведение объекта класса User."""
-        user = request.user
+        user = load_deferred_fields(request.user)
         if request.method == 'PATCH':
             serializer = UserSerializer(user, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
@@ -100,32 +141,46 @@ class GetTokenViewSet(mixins.CreateModelMixin,
         if not default_token_generator.check_token(user, confirmation_code):
             return Response('Неверный код подтверждения',
                             status=status.HTTP_400_BAD_REQUEST)
-        token = AccessToken.for_user(user)
+        token = RoleAccessToken.for_user(user)
         return Response(f'Ваш токен: {token}', status=status.HTTP_200_OK)
 
 
-class GenreViewSet(CreateRetrieveDestroyViewSet):
+class GenreViewSet(ConditionalListMixin, CachedListMixin,
+                   CreateRetrieveDestroyViewSet):
     """Вьюсет для создания объектов Genre."""
+    cache_namespaces = ('genres',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     lookup_field = 'slug'
 
 
-class CategoryViewSet(CreateRetrieveDestroyViewSet):
+class CategoryViewSet(ConditionalListMixin, CachedListMixin,
+                      CreateRetrieveDestroyViewSet):
     """Вьюсет для создания объектов Category."""
+    cache_namespaces = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, CachedListMixin,
+                   TimedListRetrieveMixin, viewsets.ModelViewSet):
     """Вьюсет для создания объектов Title."""
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    cache_namespaces = ('titles',)
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre')
     permission_classes = [IsAdmin | IsAnonymReadOnly]
     serializer_class = TitleSerializer
     pagination_class = LimitOffsetPagination
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter)
     filterset_class = TitleFilter
+    search_index = 'titles'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'rating_stats' in get_expand_fields(self.request):
+            queryset = queryset.select_related('rating_stats')
+        return queryset
 
     def get_serializer_class(self):
         """Определяет какой сериализатор использвать для Title."""
@@ -133,22 +188,99 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleGETSerializer
         return TitleSerializer
 
+    @action(detail=True, url_path='rating-stats',
+            permission_classes=(permissions.AllowAny,))
+    def rating_stats(self, request, pk=None):
+        """Распределение оценок по счетчикам TitleRatingStats."""
+        title = generics.get_object_or_404(
+            Title.objects.select_related('rating_stats'), pk=pk)
+        try:
+            stats = title.rating_stats
+        except TitleRatingStats.DoesNotExist:
+            stats = TitleRatingStats(title=title)
+        return Response(RatingStatsSerializer(stats).data)
+
+    @action(detail=False, permission_classes=(permissions.AllowAny,))
+    def top(self, request):
+        """Произведения с наибольшим взвешенным рейтингом."""
+        return self.leaderboard_response(
+            ('-leaderboard__weighted_rating', '-leaderboard__title_id'),
+            rating_count__gt=0)
+
+    @action(detail=False, permission_classes=(permissions.AllowAny,))
+    def trending(self, request):
+        """Произведения с наибольшим числом отзывов за последние дни."""
+        return self.leaderboard_response(
+            ('-leaderboard__recent_reviews', '-leaderboard__weighted_rating',
+             '-leaderboard__title_id'),
+            leaderboard__recent_reviews__gt=0)
+
+    def leaderboard_response(self, ordering, **filters):
+        """Выборка из TitleLeaderboard с фильтрами ?category= и ?genre=."""
+        params = LeaderboardQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        category = params.validated_data.get('category')
+        genre = params.validated_data.get('genre')
+        if category:
+            filters['leaderboard__category__slug'] = category
+        if genre:
+            filters['genre__slug'] = genre
+        titles = Title.objects.select_related(
+            'category', 'leaderboard').prefetch_related('genre').filter(
+            leaderboard__isnull=False, **filters).order_by(*ordering)
+        serializer = LeaderboardTitleSerializer(
+            titles[:params.validated_data['limit']], many=True)
+        return Response(serializer.data)
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """Полнотекстовый поиск по произведениям и отзывам.
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    Результаты каждого типа отсортированы по релевантности.
+    """
+    permission_classes = (permissions.AllowAny,)
+
+    def list(self, request):
+        serializer = SearchQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        text = serializer.validated_data['q']
+        limit = serializer.validated_data['limit']
+        search_type = serializer.validated_data.get('type')
+        types = (search_type,) if search_type else ('titles', 'reviews')
+
+        results = {}
+        if 'titles' in types:
+            titles = search(
+                Title.objects.select_related(
+                    'category').prefetch_related('genre'),
+                'titles', text)[:limit]
+            results['titles'] = TitleGETSerializer(titles, many=True).data
+        if 'reviews' in types:
+            reviews = search(
+                Review.objects.select_related('author', 'title'),
+                'reviews', text)[:limit]
+            results['reviews'] = SearchReviewSerializer(
+                reviews, many=True).data
+        return Response(results)
+
+
+class ReviewViewSet(ConditionalGetMixin, NestedParentMixin,
+                    TimedListRetrieveMixin, viewsets.ModelViewSet):
     """Вьюсет для создания обьектов класса Review."""
     permission_classes = [IsAdmin | IsModerator | IsAuthor,
                           permissions.IsAuthenticatedOrReadOnly]
     serializer_class = ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
+    parent_context = ('title',)
 
-    def get_title(self):
-        """Получаем объект класса Title по title_id."""
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    def get_cache_namespaces(self):
+        return (f'reviews:{self.kwargs.get("title_id")}', 'usernames')
 
     def get_queryset(self):
         """Получаем объект класса Review у объекта класса Title."""
         title = self.get_title()
-        return Review.objects.select_related('author').filter(title=title)
+        return Review.objects.select_related('author', 'title').filter(
+            title=title)
 
     def perform_create(self, serializer):
         """Создаем объект класса Review у объекта класса Title."""
@@ -164,23 +296,26 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return ReadOnlyReviewSerializer
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, NestedParentMixin,
+                     TimedListRetrieveMixin, viewsets.ModelViewSet):
     """Вьюсет для создания обьектов класса Comment."""
     permission_classes = [IsAdmin | IsModerator | IsAuthor,
                           permissions.IsAuthenticatedOrReadOnly]
     serializer_class = CommentSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
+    parent_context = ('review',)
 
-    def get_review(self):
-        """Получаем объект класса Review по title_id и review_id."""
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return get_object_or_404(
-            Review, pk=self.kwargs.get('review_id'), title=title)
+    def get_cache_namespaces(self):
+        return (f'comments:{self.kwargs.get("review_id")}', 'usernames')
 
     def get_queryset(self):
         """Получаем объект класса Comment у объекта класса Review."""
         review = self.get_review()
-        return Comment.objects.select_related('author').filter(review=review)
+        queryset = Comment.objects.select_related('author').filter(
+            review=review)
+        if 'review' in get_expand_fields(self.request):
+            queryset = queryset.select_related('review__author')
+        return queryset
 
     def perform_create(self, serializer):
         """Создание объекта класса Comment у объекта класса Review."""
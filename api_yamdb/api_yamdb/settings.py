@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,7 +68,7 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('YAMDB_DATABASE', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -107,6 +109,82 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Письма с кодом подтверждения ставятся в очередь (модель EmailOutbox)
+# и отправляются командой process_outbox вместо отправки в запросе.
+EMAIL_OUTBOX_ENABLED = False
+
+DEFAULT_FROM_EMAIL = 'YamDB@yandex.ru'
+
+# Замеры SQL-запросов и времени ответа (заголовок Server-Timing и лог
+# api.timing). Запросы дольше REQUEST_TIMING_SLOW_MS пишутся вместе
+# с SQL в лог api.timing.slow.
+REQUEST_TIMING_ENABLED = False
+
+REQUEST_TIMING_SLOW_MS = 500
+
+# Кэш ответов списков категорий, жанров и произведений (api/cache.py).
+# Файловый кэш общий для всех воркеров на одной машине; для нескольких
+# машин подойдет Redis или Memcached. Каталог кэша лежит рядом с файлом
+# базы, чтобы версии ответов разных баз (например, базы бенчмарка) не
+# смешивались.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'YAMDB_CACHE_DIR', f'{DATABASES["default"]["NAME"]}.cache'),
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = 300
+
+# max-age в Cache-Control для анонимных GET-запросов; клиенты проверяют
+# актуальность ответа по ETag и Last-Modified.
+API_CACHE_MAX_AGE = 0
+
+# Рейтинг для /titles/top/ и /titles/trending/ (reviews/leaderboard.py).
+# Оценки произведения дополняются LEADERBOARD_PRIOR_VOTES средними оценками
+# каталога; средняя кэшируется на LEADERBOARD_PRIOR_TIMEOUT секунд.
+# Команду refresh_leaderboard стоит запускать по расписанию, чтобы из
+# трендов выпадали отзывы старше LEADERBOARD_TRENDING_DAYS дней.
+LEADERBOARD_PRIOR_VOTES = 10
+
+LEADERBOARD_PRIOR_TIMEOUT = 3600
+
+LEADERBOARD_TRENDING_DAYS = 7
+
+# Метрики для /api/metrics. При нескольких воркерах gunicorn нужен общий
+# каталог METRICS_DIR, куда каждый процесс пишет свой файл
+# worker-<pid>-<время запуска>.json. Файлы завершившихся воркеров
+# удаляются при запросе /api/metrics по PID, поэтому каталог должен быть
+# общим только для процессов одной машины (одного пространства PID).
+# Эндпоинт отвечает только на запросы с заголовком `Authorization: Bearer
+# <METRICS_TOKEN>`; без токена метрики выключены.
+METRICS_TOKEN = os.getenv('YAMDB_METRICS_TOKEN')
+
+METRICS_ENABLED = bool(METRICS_TOKEN)
+
+METRICS_DIR = os.getenv('YAMDB_METRICS_DIR')
+
+METRICS_FLUSH_INTERVAL = 1
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 # Static files (CSS, JavaScript, Images)
 
 STATIC_URL = '/static/'
@@ -116,7 +194,7 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -129,3 +207,7 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+
+# Сколько секунд воркер доверяет роли из JWT без проверки версии токенов
+# пользователя в базе (api/authentication.py).
+JWT_TOKEN_VERSION_TTL = 30
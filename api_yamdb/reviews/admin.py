@@ -1,7 +1,7 @@
 from django.contrib import admin
-from django.db.models import Avg
 
-from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .models import (Category, Comment, EmailOutbox, Genre, GenreTitle,
+                     Review, Title, User)
 
 
 @admin.register(Category)
@@ -37,6 +37,10 @@ class CommentAdmin(admin.ModelAdmin):
     )
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    list_select_related = ('review', 'author')
+    raw_id_fields = ('review',)
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
@@ -50,8 +54,11 @@ class ReviewAdmin(admin.ModelAdmin):
         'pub_date',
         'score',
     )
-    search_fields = ('title',)
+    search_fields = ('title__name', '=author__username')
     list_filter = ('pub_date',)
+    list_select_related = ('title', 'author')
+    autocomplete_fields = ('title', 'author')
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
@@ -68,13 +75,14 @@ class UserAdmin(admin.ModelAdmin):
     )
     list_editable = ('role',)
     search_fields = ('username',)
-    list_filter = ('username',)
+    list_filter = ('role',)
     empty_value_display = '-пусто-'
 
 
 class GenreTitleInline(admin.TabularInline):
     model = GenreTitle
     extra = 1
+    autocomplete_fields = ('genre',)
 
 
 @admin.register(Title)
@@ -89,19 +97,43 @@ class TitleAdmin(admin.ModelAdmin):
         'description',
         'category',
         'get_rating',
+        'rating_count',
     )
     list_editable = ('category',)
+    list_select_related = ('category',)
     search_fields = ('name',)
     list_filter = ('year',)
     empty_value_display = '-пусто-'
 
+    @admin.display(description='Рейтинг', ordering='rating')
     def get_rating(self, obj):
-        """Получаем среднюю оценку произведения по оценкам пользователей"""
-        rating = Review.objects.filter(
-            title=obj.id
-        ).aggregate(Avg('score'))['score__avg']
-        if rating is not None:
-            return round(rating)
-        return None
-
-    get_rating.short_description = 'Рейтинг'
+        """Средняя оценка по счетчикам произведения, округленная."""
+        if not obj.rating_count:
+            return None
+        return round(obj.rating_sum / obj.rating_count)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """Список категорий для list_editable загружается один раз на
+        страницу, а не для каждой строки."""
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'category':
+            if not hasattr(request, '_category_choices'):
+                request._category_choices = list(field.choices)
+            field.choices = request._category_choices
+        return field
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    search_fields = ('recipient',)
+    list_filter = ('status',)
+    empty_value_display = '-пусто-'
@@ -0,0 +1,108 @@
+"""
+Таблица TitleLeaderboard для /titles/top/ и /titles/trending/.
+
+Взвешенный (байесовский) рейтинг считается как
+(rating_sum + m * C) / (rating_count + m), где C — средняя оценка по всему
+каталогу, а m — LEADERBOARD_PRIOR_VOTES. Пока у произведения мало оценок,
+его рейтинг остается близким к среднему и не обгоняет произведения
+с большим числом отзывов.
+
+Сигналы отзывов пересчитывают строку своего произведения, C берется из
+кэша. Команда refresh_leaderboard пересчитывает все строки: обновляет C
+и убирает из recent_reviews отзывы старше LEADERBOARD_TRENDING_DAYS.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum, Value)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Review, Title, TitleLeaderboard
+
+PRIOR_MEAN_KEY = 'leaderboard:prior_mean'
+# Середина шкалы оценок, пока в каталоге нет ни одного отзыва.
+DEFAULT_PRIOR_MEAN = 5.5
+
+
+def compute_prior_mean():
+    """Средняя оценка по всем отзывам каталога."""
+    totals = Title.objects.aggregate(
+        score=Sum('rating_sum'), count=Sum('rating_count'))
+    if not totals['count']:
+        return DEFAULT_PRIOR_MEAN
+    return totals['score'] / totals['count']
+
+
+def get_prior_mean():
+    return cache.get_or_set(
+        PRIOR_MEAN_KEY, compute_prior_mean,
+        settings.LEADERBOARD_PRIOR_TIMEOUT)
+
+
+def weighted_rating(prior_mean):
+    """Выражение взвешенного рейтинга по счетчикам Title."""
+    votes = float(settings.LEADERBOARD_PRIOR_VOTES)
+    return ExpressionWrapper(
+        (F('rating_sum') + Value(votes * prior_mean))
+        / (F('rating_count') + Value(votes)),
+        output_field=FloatField()
+    )
+
+
+def trending_since():
+    return timezone.now() - timedelta(
+        days=settings.LEADERBOARD_TRENDING_DAYS)
+
+
+def update_title_leaderboard(title_id, recent_delta=0, create=False):
+    """Пересчитывает строку произведения после изменения его отзывов.
+
+    Строка создается сигналом при создании произведения. Для
+    произведений, импортированных без сигналов, она создается при
+    сохранении отзыва (create=True); при каскадном удалении произведения
+    ее нельзя создавать заново.
+    """
+    rating = Title.objects.filter(pk=OuterRef('title_id')).annotate(
+        value=weighted_rating(get_prior_mean())).values('value')
+    changes = {'weighted_rating': Subquery(rating)}
+    if recent_delta:
+        # Отзыв мог не попасть в счетчик, если его импортировали без
+        # сигналов и таблицу еще не пересчитывали.
+        changes['recent_reviews'] = Greatest(
+            F('recent_reviews') + recent_delta, 0)
+    rows = TitleLeaderboard.objects.filter(title_id=title_id)
+    if rows.update(**changes) or not create:
+        return
+    category_id = Title.objects.filter(pk=title_id).values_list(
+        'category_id', flat=True).first()
+    TitleLeaderboard.objects.bulk_create(
+        [TitleLeaderboard(title_id=title_id, category_id=category_id)],
+        ignore_conflicts=True
+    )
+    rows.update(**changes)
+
+
+def refresh_leaderboard():
+    """Пересчитывает все строки таблицы и среднюю оценку каталога."""
+    prior_mean = compute_prior_mean()
+    cache.set(PRIOR_MEAN_KEY, prior_mean, settings.LEADERBOARD_PRIOR_TIMEOUT)
+    missing = Title.objects.filter(
+        leaderboard__isnull=True).values_list('pk', flat=True)
+    TitleLeaderboard.objects.bulk_create(
+        (TitleLeaderboard(title_id=pk) for pk in missing.iterator()),
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    titles = Title.objects.filter(pk=OuterRef('title_id'))
+    recent = Review.objects.filter(
+        title=OuterRef('title_id'), pub_date__gte=trending_since()
+    ).order_by().values('title').annotate(total=Count('pk')).values('total')
+    return TitleLeaderboard.objects.update(
+        category_id=Subquery(titles.values('category_id')),
+        weighted_rating=Subquery(titles.annotate(
+            value=weighted_rating(prior_mean)).values('value')),
+        recent_reviews=Coalesce(Subquery(recent), 0),
+    )
@@ -0,0 +1,23 @@
+from collections import namedtuple
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+model_tuple = namedtuple('Model', ['base', 'model', 'fields'])
+
+user = model_tuple('users.csv', User, [
+    'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'])
+category = model_tuple('category.csv', Category, [
+    'id', 'name', 'slug'])
+genre = model_tuple('genre.csv', Genre, [
+    'id', 'name', 'slug'])
+title = model_tuple('titles.csv', Title, [
+    'id', 'name', 'year', 'category_id'])
+review = model_tuple('review.csv', Review, [
+    'id', 'title_id', 'text', 'author_id', 'score', 'pub_date'])
+comment = model_tuple('comments.csv', Comment, [
+    'id', 'review_id', 'text', 'author_id', 'pub_date'])
+genre_title = model_tuple('genre_title.csv', GenreTitle, [
+    'id', 'title_id', 'genre_id'])
+
+models = (user, category, genre, title, genre_title, review, comment, )
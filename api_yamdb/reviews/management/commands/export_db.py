@@ -0,0 +1,77 @@
+import csv
+import datetime as dt
+import gzip
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from ._csv_tables import models
+
+
+def format_value(value):
+    """Приводит значение к виду, принятому в static/data/*.csv."""
+    if isinstance(value, dt.datetime):
+        return value.isoformat(timespec='milliseconds').replace(
+            '+00:00', 'Z')
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Export tables to csv or jsonl files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir', default=os.path.join(settings.BASE_DIR, 'export'),
+            help='Directory to write the files to')
+        parser.add_argument(
+            '--format', choices=('csv', 'jsonl'), default='csv',
+            help='Output format')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Compress the files with gzip')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of rows fetched from the database at a time')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля')
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for model in models:
+            self.export_table(model, options)
+        self.stdout.write(self.style.SUCCESS('Successfully export data'))
+
+    def export_table(self, model, options):
+        """Потоково выгружает таблицу в файл без загрузки ее в память."""
+        name = model.base
+        if options['format'] == 'jsonl':
+            name = name.replace('.csv', '.jsonl')
+        if options['gzip']:
+            name += '.gz'
+        path = os.path.join(options['output_dir'], name)
+        opener = gzip.open if options['gzip'] else open
+
+        rows = model.model.objects.order_by('pk').values_list(
+            *model.fields).iterator(chunk_size=options['chunk_size'])
+        started = time.monotonic()
+        exported = 0
+        with opener(path, 'wt', encoding='utf-8', newline='') as file:
+            if options['format'] == 'csv':
+                writer = csv.writer(file)
+                writer.writerow(model.fields)
+                for row in rows:
+                    writer.writerow([format_value(value) for value in row])
+                    exported += 1
+            else:
+                for row in rows:
+                    file.write(json.dumps(
+                        dict(zip(model.fields, map(format_value, row))),
+                        ensure_ascii=False
+                    ) + '\n')
+                    exported += 1
+        elapsed = time.monotonic() - started
+        rate = exported / elapsed if elapsed else 0
+        self.stdout.write(f'{name}: {exported} rows, {rate:.0f} rows/s')
@@ -0,0 +1,179 @@
+import datetime as dt
+import random
+import time
+from itertools import islice
+
+from api.cache import bump_all_versions
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+from django.db.models import Max
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'музыка', 'автор', 'жанр',
+    'актер', 'сцена', 'смысл', 'стиль', 'эпизод', 'диалог', 'атмосфера',
+    'сильный', 'скучный', 'яркий', 'неожиданный', 'долгий', 'лучший',
+)
+ROLES = ('user', 'moderator', 'admin')
+ROLE_WEIGHTS = (97, 2, 1)
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 15, 12, 8)
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument(
+            '--genres-per-title', type=int, default=2,
+            help='Maximum number of genres per title')
+        parser.add_argument(
+            '--reviews-per-title', type=float, default=20,
+            help='Average number of reviews per title, capped by --users')
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help='Zipf exponent of the reviews distribution, 0 is uniform')
+        parser.add_argument(
+            '--comments-per-review', type=float, default=1,
+            help='Average number of comments per review')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for name in ('users', 'categories', 'genres', 'titles',
+                     'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} должен быть '
+                                   'больше нуля')
+        for name in ('genres_per_title', 'reviews_per_title', 'skew',
+                     'comments_per_review'):
+            if options[name] < 0:
+                raise CommandError(f'--{name.replace("_", "-")} не может '
+                                   'быть отрицательным')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        users = self.insert(User, self.users(options['users']))
+        categories = self.insert(
+            Category, self.dictionary(Category, 'category',
+                                      options['categories']))
+        genres = self.insert(
+            Genre, self.dictionary(Genre, 'genre', options['genres']))
+        titles = self.insert(
+            Title, self.titles(options['titles'], categories))
+        self.insert(
+            GenreTitle,
+            self.genre_titles(titles, genres, options['genres_per_title']))
+        reviews = self.insert(Review, self.reviews(
+            titles, users, options['reviews_per_title'], options['skew']))
+        self.insert(Comment, self.comments(
+            reviews, users, options['comments_per_review']))
+
+        call_command('repair_counters', stdout=self.stdout)
+        bump_all_versions()
+        self.stdout.write(self.style.SUCCESS('Successfully generate data'))
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def insert(self, model, objects):
+        """Сохраняет объекты пачками и возвращает диапазон их id."""
+        first_id = self.next_id(model)
+        started = time.monotonic()
+        count = 0
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            count += len(batch)
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{model._meta.model_name}: {count} rows, {rate:.0f} rows/s')
+        return range(first_id, first_id + count)
+
+    def text(self, words):
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def users(self, count):
+        password = make_password(None)
+        first_id = self.next_id(User)
+        for pk in range(first_id, first_id + count):
+            yield User(
+                pk=pk,
+                username=f'fake_user_{pk}',
+                email=f'fake_user_{pk}@yamdb.fake',
+                role=self.random.choices(ROLES, ROLE_WEIGHTS)[0],
+                password=password,
+            )
+
+    def dictionary(self, model, prefix, count):
+        first_id = self.next_id(model)
+        for pk in range(first_id, first_id + count):
+            yield model(
+                pk=pk, name=f'{prefix} {pk}', slug=f'fake-{prefix}-{pk}')
+
+    def titles(self, count, categories):
+        first_id = self.next_id(Title)
+        last_year = dt.date.today().year
+        for pk in range(first_id, first_id + count):
+            yield Title(
+                pk=pk,
+                name=self.text(2)[:100],
+                year=self.random.randint(1900, last_year),
+                description=self.text(12),
+                category_id=self.random.choice(categories),
+            )
+
+    def genre_titles(self, titles, genres, genres_per_title):
+        pk = self.next_id(GenreTitle)
+        size = min(genres_per_title, len(genres))
+        for title_id in titles:
+            count = self.random.randint(1, size) if size else 0
+            for genre_id in self.random.sample(genres, count):
+                yield GenreTitle(pk=pk, title_id=title_id, genre_id=genre_id)
+                pk += 1
+
+    def reviews(self, titles, users, per_title, skew):
+        """Распределяет отзывы по произведениям по закону Ципфа.
+
+        Популярные произведения получают больше отзывов, но не больше,
+        чем пользователей: один автор оставляет один отзыв на произведение.
+        """
+        weights = [1 / rank ** skew for rank in range(1, len(titles) + 1)]
+        scale = per_title * len(titles) / sum(weights)
+        ranked = list(titles)
+        self.random.shuffle(ranked)
+        pk = self.next_id(Review)
+        for title_id, weight in zip(ranked, weights):
+            count = min(round(weight * scale), len(users))
+            for author_id in self.random.sample(users, count):
+                yield Review(
+                    pk=pk,
+                    title_id=title_id,
+                    author_id=author_id,
+                    text=self.text(self.random.randint(5, 40)),
+                    score=self.random.choices(
+                        range(1, 11), SCORE_WEIGHTS)[0],
+                )
+                pk += 1
+
+    def comments(self, reviews, users, per_review):
+        pk = self.next_id(Comment)
+        probability = 1 / (1 + per_review)
+        for review_id in reviews:
+            while self.random.random() > probability:
+                yield Comment(
+                    pk=pk,
+                    review_id=review_id,
+                    author_id=self.random.choice(users),
+                    text=self.text(self.random.randint(3, 20)),
+                )
+                pk += 1
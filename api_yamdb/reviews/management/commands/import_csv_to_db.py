@@ -1,54 +1,248 @@
 import csv
-from collections import namedtuple
+import os
+import time
+from collections import Counter, defaultdict
+from itertools import islice
 
+from api.cache import bump_all_versions
+from api.metrics import set_import_progress
 from django.conf import settings
-from django.core.management import BaseCommand
-from django.db.utils import IntegrityError
-from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
-                            Title, User)
-
-model_tuple = namedtuple('Model', ['base', 'model', 'fields'])
-
-user = model_tuple('users.csv', User, [
-    'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'])
-category = model_tuple('category.csv', Category, [
-    'id', 'name', 'slug'])
-genre = model_tuple('genre.csv', Genre, [
-    'id', 'name', 'slug'])
-title = model_tuple('titles.csv', Title, [
-    'id', 'name', 'year', 'category_id'])
-review = model_tuple('review.csv', Review, [
-    'id', 'title_id', 'text', 'author_id', 'score', 'pub_date'])
-comment = model_tuple('comments.csv', Comment, [
-    'id', 'review_id', 'text', 'author_id', 'pub_date'])
-genre_title = model_tuple('genre_title.csv', GenreTitle, [
-    'id', 'title_id', 'genre_id'])
-
-models = (user, category, genre, title, genre_title, review, comment, )
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import DatabaseError, transaction
+
+from ._csv_tables import models
+
+ROW_ERRORS = (DatabaseError, ValidationError, ValueError, TypeError)
+PROGRESS_INTERVAL = 1
 
 
 class Command(BaseCommand):
     help = 'Load data from csv files'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows inserted per transaction')
+        parser.add_argument(
+            '--data-dir', default=os.path.join(
+                settings.BASE_DIR, 'static', 'data'),
+            help='Directory with the csv files')
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Insert new rows and update changed rows by primary key')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report insert/update/unchanged counts without writing')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        self.upsert = options['upsert'] or options['dry_run']
+        self.dry_run = options['dry_run']
+        # pk строк, которые пробный запуск посчитал добавленными: на них
+        # могут ссылаться следующие файлы.
+        self.dry_run_inserted = defaultdict(set)
         for model in models:
-            try:
-                with open(
-                    f'{settings.BASE_DIR}/static/data/{model.base}',
-                    'r', encoding='utf-8'
-                ) as csv_file:
-                    reader = csv.DictReader(csv_file)
-                    if reader.fieldnames != model.fields:
-                        raise BaseException(
-                            f'Проверьте поля в файле {model.base}'
-                            f', требуемые поля: {model.fields}')
-                    model.model.objects.bulk_create(
-                        model.model(**data) for data in reader)
-            except IntegrityError:
-                pass
-            except FileNotFoundError:
-                raise BaseException(
+            path = os.path.join(options['data_dir'], model.base)
+            if not os.path.isfile(path):
+                raise CommandError(
                     f'Ошибка при импорте файла базы данных. '
                     f'Проверьте наличие файла {model.base} '
-                    f'по адресу: {settings.BASE_DIR}/static/data/')
+                    f'по адресу: {options["data_dir"]}')
+            self.import_file(model, path, options['batch_size'])
+        set_import_progress(model.base, {}, 0, running=False)
+        if self.dry_run:
+            self.stdout.write(self.style.SUCCESS('Dry run, nothing written'))
+            return
+        call_command('repair_counters', stdout=self.stdout)
+        bump_all_versions()
         self.stdout.write(self.style.SUCCESS('Successfully load data'))
+
+    def import_file(self, model, path, batch_size):
+        """Построчно читает файл и сохраняет его пачками по batch_size."""
+        with open(path, 'r', encoding='utf-8', newline='') as csv_file:
+            reader = csv.DictReader(csv_file)
+            if reader.fieldnames != model.fields:
+                raise CommandError(
+                    f'Проверьте поля в файле {model.base}'
+                    f', требуемые поля: {model.fields}')
+            rows = self.read_rows(reader)
+            counts = Counter()
+            started = reported = time.monotonic()
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                if self.upsert:
+                    counts.update(self.upsert_chunk(model, chunk))
+                else:
+                    counts.update(self.save_chunk(model, chunk))
+                now = time.monotonic()
+                if now - reported >= PROGRESS_INTERVAL:
+                    reported = now
+                    self.report(model, counts, now - started)
+        self.report(model, counts, time.monotonic() - started)
+
+    def read_rows(self, reader):
+        """Возвращает строки файла вместе с номером их первой строки."""
+        while True:
+            line = reader.line_num + 1
+            try:
+                data = next(reader)
+            except StopIteration:
+                return
+            yield line, data
+
+    def save_chunk(self, model, chunk):
+        """Сохраняет пачку строк в одной транзакции."""
+        rows = self.check_references(
+            model, [(line, model.model(**data)) for line, data in chunk])
+        inserted = self.insert_rows(model, rows)
+        return {'inserted': inserted, 'skipped': len(chunk) - inserted}
+
+    def upsert_chunk(self, model, chunk):
+        """Добавляет новые и обновляет измененные строки пачки по id.
+
+        Поля с auto_now_add заполняются базой при вставке и поэтому
+        не сравниваются и не обновляются.
+        """
+        fields = [
+            field for field in map(model.model._meta.get_field, model.fields)
+            if not field.primary_key and not getattr(
+                field, 'auto_now_add', False)
+        ]
+        rows = []
+        counts = Counter()
+        for line, data in chunk:
+            try:
+                values = {
+                    name: model.model._meta.get_field(name).to_python(value)
+                    for name, value in data.items()
+                }
+            except ROW_ERRORS as error:
+                self.report_row(model, line, error)
+                counts['skipped'] += 1
+                continue
+            rows.append((line, model.model(**values)))
+        checked = self.check_references(model, rows)
+        counts['skipped'] += len(rows) - len(checked)
+        rows = checked
+
+        existing = model.model.objects.in_bulk(
+            [obj.pk for _, obj in rows])
+        new_rows, changed_rows = [], []
+        for line, obj in rows:
+            current = existing.get(obj.pk)
+            if current is None:
+                new_rows.append((line, obj))
+            elif any(getattr(current, field.attname)
+                     != getattr(obj, field.attname) for field in fields):
+                changed_rows.append((line, obj))
+            else:
+                counts['unchanged'] += 1
+
+        if self.dry_run:
+            self.dry_run_inserted[model.model].update(
+                obj.pk for _, obj in new_rows)
+            counts['inserted'] += len(new_rows)
+            counts['updated'] += len(changed_rows)
+            return counts
+        inserted = self.insert_rows(model, new_rows)
+        updated = self.update_rows(
+            model, changed_rows, [field.attname for field in fields])
+        counts['inserted'] += inserted
+        counts['updated'] += updated
+        counts['skipped'] += (
+            len(new_rows) - inserted + len(changed_rows) - updated)
+        return counts
+
+    def check_references(self, model, rows):
+        """Пропускает строки со ссылками на несуществующие записи.
+
+        Внешние ключи создаются как DEFERRABLE INITIALLY DEFERRED и
+        проверяются только при фиксации транзакции, поэтому точки
+        сохранения в write_rows не отделяют такие строки от остальных.
+        """
+        for field in model.model._meta.concrete_fields:
+            if not field.is_relation or field.attname not in model.fields:
+                continue
+            values = {}
+            for line, obj in rows:
+                try:
+                    values[line] = field.to_python(
+                        getattr(obj, field.attname))
+                except ROW_ERRORS:
+                    # Ошибку значения сообщит запись строки.
+                    continue
+            existing = set(field.related_model._base_manager.only(
+                field.target_field.attname
+            ).in_bulk(
+                {value for value in values.values() if value is not None},
+                field_name=field.target_field.name
+            ))
+            if self.dry_run:
+                existing |= self.dry_run_inserted[field.related_model]
+            checked = []
+            for line, obj in rows:
+                value = values.get(line)
+                if value is not None and value not in existing:
+                    self.report_row(
+                        model, line, f'{field.attname}={value} не найден')
+                    continue
+                checked.append((line, obj))
+            rows = checked
+        return rows
+
+    def insert_rows(self, model, rows):
+        """Вставляет строки одним запросом, а при ошибке по одной."""
+        return self.write_rows(
+            model, rows,
+            lambda objects: model.model.objects.bulk_create(objects))
+
+    def update_rows(self, model, rows, fields):
+        """Обновляет строки одним запросом, а при ошибке по одной."""
+        return self.write_rows(
+            model, rows,
+            lambda objects: model.model.objects.bulk_update(objects, fields))
+
+    def write_rows(self, model, rows, write):
+        """Записывает пачку в одной транзакции.
+
+        Если пачка не записывается целиком, строки записываются по одной
+        в отдельных транзакциях, а ошибочные пропускаются.
+        """
+        if not rows:
+            return 0
+        try:
+            with transaction.atomic():
+                write([obj for _, obj in rows])
+            return len(rows)
+        except ROW_ERRORS:
+            pass
+        written = 0
+        for line, obj in rows:
+            try:
+                with transaction.atomic():
+                    write([obj])
+            except ROW_ERRORS as error:
+                self.report_row(model, line, error)
+                continue
+            written += 1
+        return written
+
+    def report_row(self, model, line, error):
+        """Сообщает о пропущенной строке файла."""
+        self.stderr.write(f'{model.base}, строка {line} пропущена: {error}')
+
+    def report(self, model, counts, elapsed):
+        """Выводит прогресс импорта и скорость загрузки."""
+        processed = counts['inserted'] + counts['updated']
+        rate = processed / elapsed if elapsed else 0
+        line = f'{model.base}: {counts["inserted"]} inserted, '
+        if self.upsert:
+            line += (f'{counts["updated"]} updated, '
+                     f'{counts["unchanged"]} unchanged, ')
+        self.stdout.write(
+            f'{line}{counts["skipped"]} skipped, {rate:.0f} rows/s')
+        set_import_progress(model.base, counts, rate)
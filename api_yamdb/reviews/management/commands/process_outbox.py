@@ -0,0 +1,111 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from reviews.models import (OUTBOX_FAILED, OUTBOX_PENDING, OUTBOX_SENT,
+                            EmailOutbox)
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of emails sent per batch')
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Attempts before an email is marked as failed')
+        parser.add_argument(
+            '--backoff', type=float, default=60,
+            help='Base retry delay in seconds, doubled on every attempt')
+        parser.add_argument(
+            '--claim-timeout', type=float, default=300,
+            help='Seconds before an email claimed by a crashed worker '
+                 'is retried')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting when empty')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Polling interval in seconds for --loop')
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        sent = failed = 0
+        try:
+            while True:
+                batch_sent, batch_failed = self.process_batch(
+                    connection, options)
+                sent += batch_sent
+                failed += batch_failed
+                if batch_sent + batch_failed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully send {sent} emails, {failed} failed attempts'))
+
+    def claim_batch(self, options):
+        """Забирает пачку писем в короткой транзакции.
+
+        Попытка засчитывается сразу, а письмо откладывается на
+        --claim-timeout секунд: другие процессы его не возьмут, а если
+        этот процесс упадет во время отправки, письмо вернется в очередь.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status=OUTBOX_PENDING, next_attempt_at__lte=now)
+                .order_by('next_attempt_at')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            EmailOutbox.objects.filter(pk__in=ids).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(
+                    seconds=options['claim_timeout'])
+            )
+        return list(EmailOutbox.objects.filter(pk__in=ids).order_by('pk'))
+
+    def process_batch(self, connection, options):
+        """Отправляет одну пачку писем через общее соединение.
+
+        Письма отправляются вне транзакции, результат каждой отправки
+        записывается отдельным запросом.
+        """
+        sent = failed = 0
+        for email in self.claim_batch(options):
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.message,
+                from_email=email.from_email,
+                to=[email.recipient],
+                connection=connection,
+            )
+            try:
+                connection.open()
+                message.send()
+            except Exception as error:
+                failed += 1
+                changes = {'last_error': str(error)}
+                if email.attempts >= options['max_attempts']:
+                    changes['status'] = OUTBOX_FAILED
+                else:
+                    delay = options['backoff'] * 2 ** (email.attempts - 1)
+                    changes['next_attempt_at'] = (
+                        timezone.now() + timedelta(seconds=delay))
+                EmailOutbox.objects.filter(pk=email.pk).update(**changes)
+                connection.close()
+                continue
+            sent += 1
+            EmailOutbox.objects.filter(pk=email.pk).update(
+                status=OUTBOX_SENT, sent_at=timezone.now(), last_error='')
+        return sent, failed
@@ -0,0 +1,35 @@
+from api.cache import bump_versions
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import (Case, Count, F, IntegerField, OuterRef,
+                              Subquery, Sum, When)
+from django.db.models.functions import Coalesce
+from reviews.leaderboard import refresh_leaderboard
+from reviews.models import Review, Title
+from reviews.rating_stats import refresh_rating_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored title ratings from reviews'
+
+    def handle(self, *args, **kwargs):
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')).order_by().values('title')
+        with transaction.atomic():
+            updated = Title.objects.update(
+                rating_sum=Coalesce(Subquery(
+                    reviews.annotate(total=Sum('score')).values('total')), 0),
+                rating_count=Coalesce(Subquery(
+                    reviews.annotate(total=Count('pk')).values('total')), 0),
+            )
+            Title.objects.update(rating=Case(
+                When(rating_count__gt=0,
+                     then=F('rating_sum') / F('rating_count')),
+                default=None,
+                output_field=IntegerField()
+            ))
+            refresh_leaderboard()
+            refresh_rating_stats()
+        bump_versions('titles')
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully recompute {updated} ratings'))
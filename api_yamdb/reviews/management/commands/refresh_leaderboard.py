@@ -0,0 +1,15 @@
+from api.cache import bump_versions
+from django.core.management import BaseCommand
+from django.db import transaction
+from reviews.leaderboard import refresh_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Recompute weighted ratings and trending counters of titles'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            updated = refresh_leaderboard()
+        bump_versions('titles')
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully refresh {updated} titles'))
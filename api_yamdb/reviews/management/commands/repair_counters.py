@@ -0,0 +1,25 @@
+from api.cache import bump_all_versions
+from django.core.management import BaseCommand, call_command
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from reviews.models import Comment, Review
+
+
+class Command(BaseCommand):
+    help = ('Recompute denormalized counters: title ratings and review '
+            'counts, comment counts of reviews')
+
+    def handle(self, *args, **kwargs):
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')).order_by().values('review')
+        actual = Coalesce(Subquery(
+            comments.annotate(total=Count('pk')).values('total')), 0)
+        with transaction.atomic():
+            stale = Review.objects.annotate(actual=actual).exclude(
+                comment_count=F('actual')).count()
+            Review.objects.update(comment_count=actual)
+        call_command('recompute_ratings', stdout=self.stdout)
+        bump_all_versions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully repair comment counts of {stale} reviews'))
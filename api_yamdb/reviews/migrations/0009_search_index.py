@@ -0,0 +1,117 @@
+from django.db import migrations
+
+# Полнотекстовые индексы для api/search.py. Таблицы FTS5 хранят только
+# индекс (external content) и синхронизируются триггерами.
+SEARCH_TABLES = (
+    ('reviews_title', ('name', 'description')),
+    ('reviews_review', ('text',)),
+)
+
+SQLITE_CREATE_TABLE = """
+    CREATE VIRTUAL TABLE {table}_fts USING fts5(
+        {columns}, content='{table}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """
+
+# Пересоздание таблицы при изменении схемы на SQLite удаляет ее триггеры:
+# миграции, меняющие reviews_title или reviews_review, должны создать
+# SQLITE_TRIGGERS заново.
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {table}_fts(rowid, {columns})
+        VALUES (new.id, {new_values});
+    END
+    """,
+    """
+    CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {table}_fts({table}_fts, rowid, {columns})
+        VALUES ('delete', old.id, {old_values});
+    END
+    """,
+    """
+    CREATE TRIGGER {table}_fts_update AFTER UPDATE OF {columns} ON {table}
+    BEGIN
+        INSERT INTO {table}_fts({table}_fts, rowid, {columns})
+        VALUES ('delete', old.id, {old_values});
+        INSERT INTO {table}_fts(rowid, {columns})
+        VALUES (new.id, {new_values});
+    END
+    """,
+)
+
+SQLITE_REBUILD = "INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"
+
+SQLITE_CREATE = (SQLITE_CREATE_TABLE,) + SQLITE_TRIGGERS + (SQLITE_REBUILD,)
+
+SQLITE_DROP_TRIGGERS = (
+    'DROP TRIGGER IF EXISTS {table}_fts_insert',
+    'DROP TRIGGER IF EXISTS {table}_fts_delete',
+    'DROP TRIGGER IF EXISTS {table}_fts_update',
+)
+
+SQLITE_DROP = SQLITE_DROP_TRIGGERS + ('DROP TABLE IF EXISTS {table}_fts',)
+
+# Выражения должны совпадать с POSTGRES_VECTORS в api/search.py,
+# иначе индекс не будет использоваться.
+POSTGRES_CREATE = (
+    "CREATE INDEX reviews_title_search_idx ON reviews_title USING GIN (("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')))",
+    "CREATE INDEX reviews_review_search_idx ON reviews_review USING GIN ("
+    "to_tsvector('simple', text))",
+)
+
+POSTGRES_DROP = (
+    'DROP INDEX IF EXISTS reviews_title_search_idx',
+    'DROP INDEX IF EXISTS reviews_review_search_idx',
+)
+
+
+def sqlite_statements(templates, tables=None):
+    for table, columns in SEARCH_TABLES:
+        if tables is not None and table not in tables:
+            continue
+        for template in templates:
+            yield template.format(
+                table=table,
+                columns=', '.join(columns),
+                new_values=', '.join(f'new.{column}' for column in columns),
+                old_values=', '.join(f'old.{column}' for column in columns),
+            )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = sqlite_statements(SQLITE_CREATE)
+    elif vendor == 'postgresql':
+        statements = POSTGRES_CREATE
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = sqlite_statements(SQLITE_DROP)
+    elif vendor == 'postgresql':
+        statements = POSTGRES_DROP
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
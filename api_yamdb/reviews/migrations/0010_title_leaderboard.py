@@ -0,0 +1,80 @@
+# Generated by Django 3.2 on 2026-10-18 06:27
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import (Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum, Value)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_leaderboard(apps, schema_editor):
+    # Повторяет reviews.leaderboard.refresh_leaderboard на исторических
+    # моделях.
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    TitleLeaderboard = apps.get_model('reviews', 'TitleLeaderboard')
+    totals = Title.objects.aggregate(
+        score=Sum('rating_sum'), count=Sum('rating_count'))
+    prior_mean = (totals['score'] / totals['count']
+                  if totals['count'] else 5.5)
+    votes = float(settings.LEADERBOARD_PRIOR_VOTES)
+    TitleLeaderboard.objects.bulk_create(
+        (TitleLeaderboard(title_id=pk)
+         for pk in Title.objects.values_list('pk', flat=True)),
+        batch_size=500
+    )
+    titles = Title.objects.filter(pk=OuterRef('title_id'))
+    recent = Review.objects.filter(
+        title=OuterRef('title_id'),
+        pub_date__gte=timezone.now() - timedelta(
+            days=settings.LEADERBOARD_TRENDING_DAYS)
+    ).order_by().values('title').annotate(total=Count('pk')).values('total')
+    TitleLeaderboard.objects.update(
+        category_id=Subquery(titles.values('category_id')),
+        weighted_rating=Subquery(titles.annotate(value=ExpressionWrapper(
+            (F('rating_sum') + Value(votes * prior_mean))
+            / (F('rating_count') + Value(votes)),
+            output_field=FloatField()
+        )).values('value')),
+        recent_reviews=Coalesce(Subquery(recent), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleLeaderboard',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('weighted_rating', models.FloatField(default=0, verbose_name='Взвешенный рейтинг')),
+                ('recent_reviews', models.PositiveIntegerField(default=0, verbose_name='Отзывов за период')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reviews.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'Позиция в рейтинге',
+                'verbose_name_plural': 'Рейтинг произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleleaderboard',
+            index=models.Index(fields=['-weighted_rating', '-title'], name='leaderboard_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleleaderboard',
+            index=models.Index(fields=['category', '-weighted_rating', '-title'], name='leaderboard_category_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleleaderboard',
+            index=models.Index(fields=['-recent_reviews', '-weighted_rating', '-title'], name='leaderboard_trending_idx'),
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_title_rating_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Увеличивается при смене данных, записанных в JWT', verbose_name='версия токенов'),
+        ),
+    ]
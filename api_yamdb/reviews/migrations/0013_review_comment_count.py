@@ -0,0 +1,52 @@
+# Generated by Django 3.2 on 2026-10-18 06:42
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+search_index = import_module('reviews.migrations.0009_search_index')
+
+
+def restore_search_triggers(apps, schema_editor):
+    # AddField/RemoveField на SQLite пересоздают reviews_review без
+    # триггеров FTS5 из миграции 0009.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in search_index.sqlite_statements(
+        search_index.SQLITE_DROP_TRIGGERS + search_index.SQLITE_TRIGGERS
+        + (search_index.SQLITE_REBUILD,),
+        tables=('reviews_review',)
+    ):
+        schema_editor.execute(statement, params=None)
+
+
+def fill_comment_count(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    comments = Comment.objects.filter(
+        review=OuterRef('pk')).order_by().values('review')
+    Review.objects.update(comment_count=Coalesce(Subquery(
+        comments.annotate(total=Count('pk')).values('total')), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_user_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop),
+    ]
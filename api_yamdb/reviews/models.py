@@ -1,7 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .validators import validate_slug, validate_year
@@ -12,6 +13,15 @@ CHOICES = (
     ('admin', 'Админ'),
 )
 
+OUTBOX_PENDING = 'pending'
+OUTBOX_SENT = 'sent'
+OUTBOX_FAILED = 'failed'
+OUTBOX_STATUSES = (
+    (OUTBOX_PENDING, 'Ожидает отправки'),
+    (OUTBOX_SENT, 'Отправлено'),
+    (OUTBOX_FAILED, 'Ошибка отправки'),
+)
+
 
 class Genre(models.Model):
     """Модель для создания обьектов класса Genre."""
@@ -90,6 +100,21 @@ class Title(models.Model):
         verbose_name=_('Категория'),
         help_text=_('Выберите категорию')
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name=_('Сумма оценок'),
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name=_('Количество оценок'),
+        default=0,
+        editable=False
+    )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name=_('Рейтинг'),
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Произведение'
@@ -137,6 +162,12 @@ class User(AbstractUser):
         choices=CHOICES,
         default='user'
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name=_('версия токенов'),
+        default=0,
+        editable=False,
+        help_text=_('Увеличивается при смене данных, записанных в JWT')
+    )
 
     class Meta:
         verbose_name = _('Пользователь')
@@ -173,12 +204,134 @@ class GenreTitle(models.Model):
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['genre', 'title'],
+                name='unique genre title')
+        ]
         ordering = ('id',)
 
     def __str__(self):
         return f'Произведение: {self.title}, жанр:{self.genre}'
 
 
+class TitleLeaderboard(models.Model):
+    """Предрасчитанные позиции произведения в топе и трендах."""
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='leaderboard',
+        verbose_name=_('Произведение')
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name=_('Категория')
+    )
+    weighted_rating = models.FloatField(
+        verbose_name=_('Взвешенный рейтинг'),
+        default=0
+    )
+    recent_reviews = models.PositiveIntegerField(
+        verbose_name=_('Отзывов за период'),
+        default=0
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-weighted_rating', '-title'],
+                name='leaderboard_top_idx'),
+            models.Index(
+                fields=['category', '-weighted_rating', '-title'],
+                name='leaderboard_category_top_idx'),
+            models.Index(
+                fields=['-recent_reviews', '-weighted_rating', '-title'],
+                name='leaderboard_trending_idx'),
+        ]
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Рейтинг произведений'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.weighted_rating:.2f}'
+
+
+SCORES = range(1, 11)
+
+
+class TitleRatingStats(models.Model):
+    """Число оценок каждого значения от 1 до 10 у произведения."""
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rating_stats',
+        verbose_name=_('Произведение')
+    )
+    score_1 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 1'), default=0)
+    score_2 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 2'), default=0)
+    score_3 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 3'), default=0)
+    score_4 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 4'), default=0)
+    score_5 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 5'), default=0)
+    score_6 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 6'), default=0)
+    score_7 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 7'), default=0)
+    score_8 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 8'), default=0)
+    score_9 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 9'), default=0)
+    score_10 = models.PositiveIntegerField(
+        verbose_name=_('Оценок 10'), default=0)
+
+    class Meta:
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.histogram}'
+
+    @property
+    def histogram(self):
+        return {score: getattr(self, f'score_{score}') for score in SCORES}
+
+    @property
+    def count(self):
+        return sum(self.histogram.values())
+
+    @property
+    def mean(self):
+        count = self.count
+        if not count:
+            return None
+        return sum(
+            score * votes for score, votes in self.histogram.items()) / count
+
+    @property
+    def median(self):
+        """Медиана по гистограмме: среднее двух центральных оценок."""
+        count = self.count
+        if not count:
+            return None
+        middle = ((count - 1) // 2, count // 2)
+        values = []
+        seen = 0
+        for score, votes in self.histogram.items():
+            values.extend(
+                score for position in middle
+                if seen <= position < seen + votes)
+            seen += votes
+        return sum(values) / len(values)
+
+
 class Review(models.Model):
     """Модель для создания обьектов класса Review."""
     title = models.ForeignKey(
@@ -212,6 +365,11 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    comment_count = models.PositiveIntegerField(
+        verbose_name=_('Количество комментариев'),
+        default=0,
+        editable=False
+    )
 
     class Meta:
         constraints = [
@@ -226,6 +384,11 @@ class Review(models.Model):
                 fields=['title', 'author'],
                 name='unique review')
         ]
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx')
+        ]
         ordering = ['-pub_date']
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -233,6 +396,11 @@ class Review(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв в одной транзакции с пересчетом рейтинга."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель для создания обьектов класса Comment."""
@@ -261,9 +429,82 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx')
+        ]
         ordering = ['-pub_date']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text[:15]
+
+    def save(self, *args, **kwargs):
+        """Сохраняет комментарий в одной транзакции со счетчиком отзыва."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class EmailOutbox(models.Model):
+    """Модель для очереди исходящих писем."""
+    subject = models.CharField(
+        max_length=256,
+        verbose_name=_('Тема')
+    )
+    message = models.TextField(
+        verbose_name=_('Текст письма')
+    )
+    from_email = models.EmailField(
+        max_length=254,
+        verbose_name=_('Отправитель')
+    )
+    recipient = models.EmailField(
+        max_length=254,
+        verbose_name=_('Получатель')
+    )
+    status = models.CharField(
+        max_length=20,
+        verbose_name=_('Статус'),
+        choices=OUTBOX_STATUSES,
+        default=OUTBOX_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name=_('Количество попыток'),
+        default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name=_('Следующая попытка'),
+        default=timezone.now
+    )
+    last_error = models.TextField(
+        verbose_name=_('Последняя ошибка'),
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_('Дата создания'),
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name=_('Дата отправки'),
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outbox_status_next_idx')
+        ]
+        ordering = ['next_attempt_at']
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
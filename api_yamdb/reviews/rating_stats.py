@@ -0,0 +1,52 @@
+"""
+Счетчики оценок TitleRatingStats для /titles/{id}/rating-stats/.
+
+Сигналы отзывов меняют один-два счетчика строки произведения, поэтому
+статистика не требует группировки отзывов при каждом запросе. Команда
+recompute_ratings пересчитывает все строки по таблице отзывов.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import SCORES, Review, Title, TitleRatingStats
+
+
+def update_rating_stats(title_id, removed=None, added=None, create=False):
+    """Уменьшает счетчик оценки removed и увеличивает счетчик added.
+
+    Как и в update_title_leaderboard, строка создается только при
+    сохранении отзыва (create=True).
+    """
+    if removed == added:
+        return
+    changes = {}
+    if removed is not None:
+        changes[f'score_{removed}'] = Greatest(
+            F(f'score_{removed}') - 1, 0)
+    if added is not None:
+        changes[f'score_{added}'] = F(f'score_{added}') + 1
+    rows = TitleRatingStats.objects.filter(title_id=title_id)
+    if rows.update(**changes) or not create:
+        return
+    TitleRatingStats.objects.bulk_create(
+        [TitleRatingStats(title_id=title_id)], ignore_conflicts=True)
+    rows.update(**changes)
+
+
+def refresh_rating_stats():
+    """Пересчитывает счетчики всех произведений по таблице отзывов."""
+    missing = Title.objects.filter(
+        rating_stats__isnull=True).values_list('pk', flat=True)
+    TitleRatingStats.objects.bulk_create(
+        (TitleRatingStats(title_id=pk) for pk in missing.iterator()),
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    reviews = Review.objects.filter(
+        title=OuterRef('title_id')).order_by().values('title')
+    return TitleRatingStats.objects.update(**{
+        f'score_{score}': Coalesce(Subquery(
+            reviews.filter(score=score).annotate(
+                total=Count('pk')).values('total')), 0)
+        for score in SCORES
+    })
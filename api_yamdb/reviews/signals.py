@@ -0,0 +1,140 @@
+from django.db.models import Case, F, IntegerField, When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .leaderboard import trending_since, update_title_leaderboard
+from .models import (Comment, Review, Title, TitleLeaderboard,
+                     TitleRatingStats, User)
+from .rating_stats import update_rating_stats
+
+
+# Поля пользователя, которые api.authentication записывает в JWT.
+TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    """Инкрементально обновляет сумму, число оценок и рейтинг произведения.
+
+    Все значения в правой части UPDATE берутся из строки до изменения,
+    поэтому новый рейтинг вычисляется через старые значения и приращения.
+    """
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+        rating=Case(
+            When(
+                rating_count__gt=-count_delta,
+                then=(F('rating_sum') + score_delta)
+                / (F('rating_count') + count_delta)
+            ),
+            default=None,
+            output_field=IntegerField()
+        )
+    )
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, **kwargs):
+    """Запоминает оценку и произведение отзыва до его изменения."""
+    instance._previous_rating = None
+    if not instance._state.adding:
+        instance._previous_rating = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def apply_review_score(sender, instance, created, **kwargs):
+    """Учитывает новую или измененную оценку в рейтинге произведения."""
+    previous = getattr(instance, '_previous_rating', None)
+    if created or previous is None:
+        update_title_rating(instance.title_id, instance.score, 1)
+        update_title_leaderboard(instance.title_id, 1, create=True)
+        update_rating_stats(
+            instance.title_id, added=instance.score, create=True)
+        return
+    previous_title_id, previous_score = previous
+    recent = int(instance.pub_date >= trending_since())
+    if previous_title_id != instance.title_id:
+        update_title_rating(previous_title_id, -previous_score, -1)
+        update_title_rating(instance.title_id, instance.score, 1)
+        update_title_leaderboard(previous_title_id, -recent)
+        update_title_leaderboard(instance.title_id, recent, create=True)
+        update_rating_stats(previous_title_id, removed=previous_score)
+        update_rating_stats(
+            instance.title_id, added=instance.score, create=True)
+    elif previous_score != instance.score:
+        update_title_rating(
+            instance.title_id, instance.score - previous_score, 0)
+        update_title_leaderboard(instance.title_id, create=True)
+        update_rating_stats(
+            instance.title_id, previous_score, instance.score, create=True)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, **kwargs):
+    """Исключает оценку удаленного отзыва из рейтинга произведения."""
+    update_title_rating(instance.title_id, -instance.score, -1)
+    update_title_leaderboard(
+        instance.title_id, -int(instance.pub_date >= trending_since()))
+    update_rating_stats(instance.title_id, removed=instance.score)
+
+
+@receiver(post_save, sender=Title)
+def sync_title_counters(sender, instance, created, **kwargs):
+    """Создает строки рейтинга и счетчиков оценок нового произведения.
+
+    Категория хранится в таблице рейтинга для выборки топа категории.
+    """
+    if created:
+        TitleLeaderboard.objects.create(
+            title=instance, category_id=instance.category_id)
+        TitleRatingStats.objects.create(title=instance)
+    else:
+        TitleLeaderboard.objects.filter(title_id=instance.pk).update(
+            category_id=instance.category_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        Review.objects.filter(pk=instance.review_id).update(
+            comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    Review.objects.filter(pk=instance.review_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0))
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_user(sender, instance, **kwargs):
+    """Одним запросом читает прежние данные пользователя.
+
+    Их используют обработчики post_save пользователя здесь и в api.signals.
+    """
+    instance._previous_user = None
+    if not instance._state.adding:
+        instance._previous_user = User.objects.filter(pk=instance.pk).values(
+            *TOKEN_CLAIM_FIELDS, 'token_version').first()
+
+
+@receiver(post_save, sender=User)
+def bump_token_version(sender, instance, **kwargs):
+    """Выданные токены перестают приниматься без проверки по базе.
+
+    save() записывает token_version из объекта, который мог устареть,
+    поэтому новая версия считается от большей из двух.
+    """
+    previous = getattr(instance, '_previous_user', None)
+    if previous is None or all(
+        previous[field] == getattr(instance, field)
+        for field in TOKEN_CLAIM_FIELDS
+    ):
+        return
+    version = max(previous['token_version'], instance.token_version) + 1
+    User.objects.filter(pk=instance.pk).update(
+        token_version=Greatest(F('token_version') + 1, version))
+    instance.token_version = version
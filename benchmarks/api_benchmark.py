@@ -0,0 +1,396 @@
+"""
+Нагрузочный бенчмарк API YaMDb.
+
+Создает базу SQLite с синтетическими данными фиксированного размера
+(команда generate_fake_data), параллельно выполняет запросы к основным
+эндпоинтам и сохраняет JSON-отчет с пропускной способностью и
+задержками p50/p95/p99 по каждому сценарию.
+
+По умолчанию запросы идут в WSGI-приложение в этом же процессе.
+С --base-url запросы отправляются на уже запущенный сервер
+(runserver/gunicorn), который должен читать ту же базу:
+
+    YAMDB_DATABASE=/tmp/bench.sqlite3 python benchmarks/api_benchmark.py \\
+        --prepare-only
+    YAMDB_DATABASE=/tmp/bench.sqlite3 gunicorn api_yamdb.wsgi ...
+    YAMDB_DATABASE=/tmp/bench.sqlite3 python benchmarks/api_benchmark.py \\
+        --reuse-database --base-url http://127.0.0.1:8000
+
+Сравнение с отчетом предыдущего коммита:
+
+    python benchmarks/api_benchmark.py --output new.json --compare old.json
+
+Если p95 какого-либо сценария вырос больше чем на --threshold,
+скрипт завершается с кодом 1.
+
+На SQLite пишущие сценарии (WRITE_SCENARIOS) выполняются в один поток:
+параллельная запись упирается в блокировку базы и измеряет ожидание
+"database is locked", а не работу API. Задержки считаются только по
+успешным ответам, ошибки учитываются отдельно в errors и statuses.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'api_yamdb')
+
+WRITE_SCENARIOS = ('review_create', 'auth_signup')
+
+DATASET = {
+    'users': 500,
+    'categories': 5,
+    'genres': 20,
+    'titles': 500,
+    'reviews_per_title': 20,
+    'comments_per_review': 1,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default='bench_output.json',
+                        help='Path of the JSON report')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--base-url',
+                        help='Benchmark a running server instead')
+    parser.add_argument('--reuse-database', action='store_true',
+                        help='Do not recreate YAMDB_DATABASE')
+    parser.add_argument('--prepare-only', action='store_true',
+                        help='Only create and seed the database')
+    parser.add_argument('--scenario', action='append',
+                        help='Run only the given scenarios')
+    parser.add_argument('--compare', help='Baseline report to compare to')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative p95 growth')
+    return parser.parse_args()
+
+
+def setup_django(args):
+    """Настраивает Django на отдельную базу бенчмарка."""
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    if 'YAMDB_DATABASE' not in os.environ:
+        os.environ['YAMDB_DATABASE'] = os.path.join(
+            tempfile.mkdtemp(prefix='yamdb-bench-'), 'bench.sqlite3')
+    database = os.environ['YAMDB_DATABASE']
+    if not args.reuse_database and os.path.exists(database):
+        os.remove(database)
+
+    import django
+    from django.conf import settings
+    settings.DEBUG = False
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 30
+    django.setup()
+    return database
+
+
+def prepare_database(args):
+    """Создает схему и наполняет базу данными фиксированного размера."""
+    from django.core.management import call_command
+    from reviews.models import Title
+
+    call_command('migrate', verbosity=0)
+    if not Title.objects.exists():
+        call_command('generate_fake_data', seed=args.seed,
+                     stdout=open(os.devnull, 'w'), **DATASET)
+
+
+def build_fixtures(args):
+    """Собирает id объектов и токены, нужные сценариям."""
+    from django.contrib.auth.tokens import default_token_generator
+    from django.db.models import Count
+    from api.authentication import RoleAccessToken
+    from reviews.models import Genre, Review, Title, User
+
+    popular = Review.objects.order_by().values('title').annotate(
+        total=Count('pk')).order_by('-total').first()['title']
+    review = Review.objects.filter(title=popular).annotate(
+        total=Count('comments')).order_by('-total').first()
+    token_user, _ = User.objects.get_or_create(
+        username='bench_token', email='bench_token@yamdb.fake')
+    target = Title.objects.create(
+        name='Benchmark', year=2000,
+        category_id=Title.objects.values_list(
+            'category_id', flat=True).first())
+    User.objects.bulk_create(
+        User(username=f'bench_{target.pk}_{idx}',
+             email=f'bench_{target.pk}_{idx}@yamdb.fake')
+        for idx in range(args.requests)
+    )
+    authors = User.objects.filter(
+        username__startswith=f'bench_{target.pk}_')
+    return {
+        'title_ids': list(Title.objects.values_list('pk', flat=True)[:200]),
+        'popular_title': popular,
+        'review': (review.title_id, review.pk),
+        'genre': Genre.objects.values_list('slug', flat=True).first(),
+        'token_user': token_user.username,
+        'confirmation_code': default_token_generator.make_token(token_user),
+        'target_title': target.pk,
+        'author_tokens': [
+            str(RoleAccessToken.for_user(user)) for user in authors],
+    }
+
+
+def build_scenarios(fixtures, run_id):
+    """Возвращает сценарии: имя -> функция (номер запроса) -> запрос."""
+    titles = fixtures['title_ids']
+    title_id, review_id = fixtures['review']
+    tokens = fixtures['author_tokens']
+    return {
+        'titles_list': lambda n: ('GET', '/api/v1/titles/', None, None),
+        'titles_filter_genre': lambda n: (
+            'GET', f'/api/v1/titles/?genre={fixtures["genre"]}', None, None),
+        'title_detail': lambda n: (
+            'GET', f'/api/v1/titles/{titles[n % len(titles)]}/', None, None),
+        'reviews_list': lambda n: (
+            'GET', f'/api/v1/titles/{fixtures["popular_title"]}/reviews/',
+            None, None),
+        'reviews_deep_offset': lambda n: (
+            'GET', f'/api/v1/titles/{fixtures["popular_title"]}/reviews/'
+                   '?offset=400', None, None),
+        'reviews_cursor': lambda n: (
+            'GET', f'/api/v1/titles/{fixtures["popular_title"]}/reviews/'
+                   '?cursor=', None, None),
+        'comments_list': lambda n: (
+            'GET', f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            None, None),
+        'review_create': lambda n: (
+            'POST', f'/api/v1/titles/{fixtures["target_title"]}/reviews/',
+            {'text': 'benchmark', 'score': n % 10 + 1},
+            tokens[n % len(tokens)]),
+        'auth_signup': lambda n: (
+            'POST', '/api/v1/auth/signup/',
+            {'username': f'signup_{run_id}_{n}',
+             'email': f'signup_{run_id}_{n}@yamdb.fake'}, None),
+        'auth_token': lambda n: (
+            'POST', '/api/v1/auth/token/',
+            {'username': fixtures['token_user'],
+             'confirmation_code': fixtures['confirmation_code']}, None),
+    }
+
+
+class InProcessClient:
+    """Выполняет запросы через WSGI-приложение в текущем процессе."""
+
+    def __init__(self):
+        from django.test import Client
+        self.local = threading.local()
+        self.client_class = Client
+
+    def request(self, method, path, data, token):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.client_class()
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        if method == 'GET':
+            response = client.get(path, **extra)
+        else:
+            response = client.post(path, data=json.dumps(data),
+                                   content_type='application/json', **extra)
+        return response.status_code
+
+    def close(self):
+        from django.db import connections
+        connections.close_all()
+
+
+class HttpClient:
+    """Выполняет запросы к запущенному серверу по HTTP."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data, token):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def close(self):
+        pass
+
+
+def percentile(values, fraction):
+    """Процентиль методом ближайшего ранга по отсортированному списку."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1,
+                       int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def run_scenario(client, build_request, args, concurrency):
+    """Выполняет сценарий параллельно и возвращает статистику."""
+    counter = count()
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+    errors = 0
+
+    def worker():
+        while True:
+            with lock:
+                number = next(counter)
+            if number >= args.requests:
+                return
+            method, path, data, token = build_request(number)
+            started = time.perf_counter()
+            try:
+                status = client.request(method, path, data, token)
+            except Exception as error:
+                status = type(error).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            failed = not isinstance(status, int) or status >= 400
+            with lock:
+                nonlocal errors
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    duration = time.perf_counter() - started
+    client.close()
+
+    return {
+        'requests': args.requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'statuses': statuses,
+        'throughput_rps': round(args.requests / duration, 2),
+        'latency_ms': summarize(sorted(latencies)),
+    }
+
+
+def summarize(latencies):
+    """Задержки успешных запросов; None, если успешных не было."""
+    if not latencies:
+        return None
+    return {
+        'min': round(latencies[0], 3),
+        'mean': round(sum(latencies) / len(latencies), 3),
+        'p50': round(percentile(latencies, 0.50), 3),
+        'p95': round(percentile(latencies, 0.95), 3),
+        'p99': round(percentile(latencies, 0.99), 3),
+        'max': round(latencies[-1], 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    """Возвращает список сценариев, у которых вырос p95."""
+    regressions = []
+    for name, result in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not (previous and previous['latency_ms']
+                and result['latency_ms']):
+            continue
+        old = previous['latency_ms']['p95']
+        new = result['latency_ms']['p95']
+        change = (new - old) / old if old else 0
+        line = f'{name}: p95 {old:.2f} -> {new:.2f} ms ({change:+.0%})'
+        if change > threshold:
+            regressions.append(line)
+        print(line)
+    return regressions
+
+
+def main():
+    args = parse_args()
+    database = setup_django(args)
+    prepare_database(args)
+    if args.prepare_only:
+        print(f'Database ready: {database}')
+        return 0
+
+    fixtures = build_fixtures(args)
+    scenarios = build_scenarios(fixtures, run_id=int(time.time()))
+    if args.scenario:
+        unknown = set(args.scenario) - set(scenarios)
+        if unknown:
+            raise SystemExit(f'Unknown scenarios: {", ".join(unknown)}')
+        scenarios = {name: scenarios[name] for name in args.scenario}
+    client = (HttpClient(args.base_url) if args.base_url
+              else InProcessClient())
+
+    import django
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'target': args.base_url or 'in-process',
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'dataset': DATASET,
+        },
+        'scenarios': {},
+    }
+    from django.db import connection
+    serialize_writes = connection.vendor == 'sqlite'
+    for name, build_request in scenarios.items():
+        concurrency = args.concurrency
+        if serialize_writes and name in WRITE_SCENARIOS:
+            concurrency = 1
+        result = run_scenario(client, build_request, args, concurrency)
+        report['scenarios'][name] = result
+        latency = result['latency_ms'] or {}
+        print(f'{name}: {result["throughput_rps"]} req/s, '
+              f'concurrency {concurrency}, '
+              f'p50 {latency.get("p50")} ms, '
+              f'p95 {latency.get("p95")} ms, '
+              f'p99 {latency.get("p99")} ms, '
+              f'errors {result["errors"]}')
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f'Report written to {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        if regressions:
+            print('Regressions:\n' + '\n'.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
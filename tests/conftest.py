@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,37 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix,
+                                 tmp_path_factory):
+    """
+    Тестовая база SQLite — файл, а не память с общим кэшем: иначе
+    чтение из другого соединения во время открытой транзакции записи
+    падает с ошибкой блокировки таблицы.
+    """
+    from django.conf import settings
+    database = settings.DATABASES['default']
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database.setdefault('TEST', {})['NAME'] = str(
+            tmp_path_factory.mktemp('db') / 'test.sqlite3')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def local_cache():
+    """Тесты не трогают файловый кэш разработчика."""
+    from django.test import override_settings
+    with override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yamdb-tests',
+    }}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from api.authentication import token_versions
+    from django.core.cache import cache
+    cache.clear()
+    token_versions.clear()
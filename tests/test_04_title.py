@@ -1,6 +1,8 @@
 from http import HTTPStatus
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from tests.utils import (check_pagination, check_permissions,
                          create_categories, create_genre, create_titles)
@@ -316,3 +318,81 @@ class Test04TitleAPI:
                           HTTPStatus.FORBIDDEN)
         check_permissions(moderator_client, url, data, 'модератора',
                           titles, HTTPStatus.FORBIDDEN)
+
+    def test_06_titles_list_query_count(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        for idx in range(4):
+            admin_client.post(url, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genres[0]['slug'], genres[2]['slug']],
+                'category': categories[idx % 2]['slug'],
+            })
+
+        query_counts = []
+        for limit in (1, 6):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(f'{url}?limit={limit}')
+            assert response.status_code == HTTPStatus.OK
+            assert len(response.json()['results']) == limit
+            query_counts.append(len(context.captured_queries))
+
+        assert query_counts[0] == query_counts[1], (
+            f'Проверьте, что количество SQL-запросов при GET-запросе к '
+            f'`{url}` не зависит от размера страницы. Сейчас: '
+            f'{query_counts[0]} запросов для 1 произведения и '
+            f'{query_counts[1]} для 6.'
+        )
+        assert query_counts[1] <= 3, (
+            f'Проверьте, что GET-запрос к `{url}` загружает категории и '
+            'жанры произведений без отдельного запроса на каждое '
+            'произведение.'
+        )
+
+    def test_07_titles_slug_filters(self, client, admin_client):
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+        admin_client.post(url, data={
+            'name': 'Комедийная драма',
+            'year': 2001,
+            'genre': ['comedy', 'drama'],
+            'category': 'books',
+        })
+
+        def get_names(query):
+            response = client.get(f'{url}?{query}&limit=10')
+            assert response.status_code == HTTPStatus.OK
+            return sorted(
+                title['name'] for title in response.json()['results'])
+
+        assert get_names('genre=dr') == [], (
+            f'Проверьте, что фильтр `genre` эндпоинта `{url}` сравнивает '
+            '`slug` жанра точно, а не по подстроке.'
+        )
+        assert get_names('genre_contains=dr') == [
+            'Комедийная драма', 'Крепкий орешек']
+        assert get_names('genre=horror,drama') == [
+            'Комедийная драма', 'Крепкий орешек', 'Терминатор'], (
+            f'Проверьте, что фильтр `genre` эндпоинта `{url}` принимает '
+            'несколько `slug` через запятую и не дублирует произведения.'
+        )
+        assert get_names('genre=comedy,drama&genre_match=all') == [
+            'Комедийная драма'], (
+            f'Проверьте, что `{url}?genre=...&genre_match=all` отбирает '
+            'произведения со всеми указанными жанрами.'
+        )
+        assert get_names('genre=horror,comedy&genre_match=all') == [
+            'Терминатор']
+        assert get_names('category=films,books') == [
+            'Комедийная драма', 'Крепкий орешек', 'Терминатор']
+        assert get_names('category=fil') == []
+        assert get_names('category_contains=fil') == ['Терминатор']
+        for query in ('genre=,,', 'category=,', 'genre=,&genre_match=all'):
+            assert len(get_names(query)) == 3, (
+                f'Проверьте, что `{url}?{query}` без slug не фильтрует '
+                'произведения.'
+            )
+
+        response = client.get(f'{url}?genre=drama&genre_match=some')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
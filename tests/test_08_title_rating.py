@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Title
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user,
+                                              moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url_template = '/api/v1/titles/{title_id}/reviews/{review_id}/'
+
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзывов.'
+        )
+
+        response = user_client.patch(
+            url_template.format(
+                title_id=title_id, review_id=reviews[1]['id']),
+            data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки в отзыве.'
+        )
+
+        response = user_client.delete(
+            url_template.format(title_id=title_id, review_id=reviews[1]['id'])
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+        for review in (reviews[0], reviews[2]):
+            admin_client.delete(
+                url_template.format(title_id=title_id, review_id=review['id'])
+            )
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Проверьте, что после удаления всех отзывов рейтинг произведения '
+            'равен `None`.'
+        )
+
+    def test_02_recompute_ratings(self, admin_client, admin, user_client,
+                                  user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        assert self.get_rating(admin_client, title_id) is None
+
+        call_command('recompute_ratings')
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (10, 2), (
+            'Проверьте, что команда `recompute_ratings` восстанавливает '
+            'сумму и количество оценок произведения.'
+        )
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что команда `recompute_ratings` восстанавливает '
+            'рейтинг произведения.'
+        )
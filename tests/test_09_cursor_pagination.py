@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def collect_pages(self, client, url):
+        ids = []
+        pages = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` в режиме курсора '
+                'возвращает ответ со статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсора ответ не содержит ключ '
+                '`count`: он требует дополнительного COUNT(*).'
+            )
+            pages.append(data)
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids, pages
+
+    def test_01_reviews_cursor(self, client, admin_client, admin,
+                               user_client, user, moderator_client,
+                               moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        expected = [item['id'] for item in client.get(url).json()['results']]
+        ids, pages = self.collect_pages(client, f'{url}?cursor=&limit=2')
+        assert ids == expected, (
+            f'Проверьте, что в режиме курсора `{url}` возвращает все '
+            'отзывы в том же порядке, что и без курсора.'
+        )
+        assert len(pages) == 2 and pages[0]['previous'] is None
+
+        response = client.get(pages[1]['previous'])
+        assert response.status_code == HTTPStatus.OK
+        previous_ids = [item['id'] for item in response.json()['results']]
+        assert previous_ids == expected[:2], (
+            'Проверьте, что ссылка `previous` в режиме курсора ведет на '
+            'предыдущую страницу.'
+        )
+
+        response = client.get(f'{url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что некорректный курсор приводит к ответу со '
+            'статусом 404.'
+        )
+
+    def test_02_comments_cursor(self, client, admin_client, admin,
+                                user_client, user, moderator_client,
+                                moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+
+        expected = [item['id'] for item in client.get(url).json()['results']]
+        ids, _ = self.collect_pages(client, f'{url}?cursor=&limit=1')
+        assert ids == expected, (
+            f'Проверьте, что в режиме курсора `{url}` возвращает все '
+            'комментарии в том же порядке, что и без курсора.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            client.get(f'{url}?cursor=&limit=1')
+        assert not any(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что в режиме курсора не выполняется COUNT(*).'
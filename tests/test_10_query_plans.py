@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from reviews.models import GenreTitle
+
+from tests.utils import create_comments, create_titles
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='EXPLAIN QUERY PLAN проверяется только для SQLite'
+)
+
+
+def get_query_plan(client, url, *markers):
+    """Возвращает план первого SQL-запроса эндпоинта со всеми markers."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if all(marker in query['sql'] for marker in markers)
+    ]
+    assert queries, f'Запрос {markers} при GET-запросе к `{url}` не найден.'
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {queries[0]}')
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10QueryPlans:
+
+    def test_01_nested_endpoints_use_indexes(self, client, admin_client,
+                                             admin, user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+
+        for url, marker, index in (
+            (reviews_url, 'FROM "reviews_review"',
+             'review_title_pub_date_idx'),
+            (f'{reviews_url}?cursor=', 'FROM "reviews_review"',
+             'review_title_pub_date_idx'),
+            (comments_url, 'FROM "reviews_comment"',
+             'comment_review_pub_date_idx'),
+            (f'{comments_url}?cursor=', 'FROM "reviews_comment"',
+             'comment_review_pub_date_idx'),
+        ):
+            plan = get_query_plan(client, url, marker, 'ORDER BY')
+            assert index in plan, (
+                f'Проверьте, что выборка для `{url}` использует индекс '
+                f'`{index}`. План запроса:\n{plan}'
+            )
+            assert 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что сортировка для `{url}` выполняется по '
+                f'индексу, а не во временном B-дереве. План:\n{plan}'
+            )
+
+    def test_02_genre_title_unique(self, admin_client):
+        create_titles(admin_client)
+        genre_title = GenreTitle.objects.first()
+        with pytest.raises(IntegrityError):
+            GenreTitle.objects.create(
+                genre_id=genre_title.genre_id, title_id=genre_title.title_id)
+
+    def test_03_genre_filter_uses_indexes(self, client, admin_client):
+        create_titles(admin_client)
+        url = '/api/v1/titles/?genre=horror,drama'
+        plan = get_query_plan(client, url, 'FROM "reviews_title"', 'LIMIT')
+        assert 'SEARCH reviews_genre ' in plan and '(slug=?)' in plan, (
+            f'Проверьте, что фильтр `{url}` ищет жанр по индексу `slug`. '
+            f'План запроса:\n{plan}'
+        )
+        assert 'SCAN reviews_genretitle' not in plan, (
+            f'Проверьте, что фильтр `{url}` выбирает связи жанров и '
+            f'произведений по индексу. План запроса:\n{plan}'
+        )
@@ -0,0 +1,53 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11CommentReview:
+
+    def test_01_comment_review_is_id(self, client, admin_client, admin,
+                                     user_client, user, moderator_client,
+                                     moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+
+        query_counts = []
+        for limit in (1, 3):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(f'{url}?limit={limit}')
+            assert response.status_code == HTTPStatus.OK
+            query_counts.append(len(context.captured_queries))
+            for comment in response.json()['results']:
+                assert comment['review'] == reviews[0]['id'], (
+                    f'Проверьте, что в ответе на GET-запрос к `{url}` поле '
+                    '`review` содержит id отзыва, а не его текст.'
+                )
+        assert query_counts[0] == query_counts[1], (
+            f'Проверьте, что GET-запрос к `{url}` не загружает отзыв '
+            'отдельным запросом для каждого комментария.'
+        )
+
+        response = client.get(f'{url}?expand=review')
+        assert response.status_code == HTTPStatus.OK
+        review = response.json()['results'][0]['review']
+        assert review == {
+            'id': reviews[0]['id'],
+            'text': reviews[0]['text'],
+            'author': reviews[0]['author'],
+            'score': reviews[0]['score'],
+            'pub_date': review['pub_date'],
+        }, (
+            f'Проверьте, что GET-запрос к `{url}?expand=review` возвращает '
+            'краткое представление отзыва в поле `review`.'
+        )
@@ -0,0 +1,107 @@
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from reviews.models import (OUTBOX_FAILED, OUTBOX_PENDING, OUTBOX_SENT,
+                            EmailOutbox)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.fixture(autouse=True)
+    def enable_outbox(self, settings):
+        settings.EMAIL_OUTBOX_ENABLED = True
+
+    def signup(self, client, username):
+        response = client.post(self.url_signup, data={
+            'email': f'{username}@yamdb.fake',
+            'username': username
+        })
+        assert response.status_code == HTTPStatus.OK
+        return response
+
+    def test_01_signup_enqueues_email(self, client):
+        outbox_before_count = len(mail.outbox)
+        self.signup(client, 'queued_user')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что при включенной очереди писем регистрация не '
+            'отправляет письмо в рамках запроса.'
+        )
+        email = EmailOutbox.objects.get()
+        assert email.status == OUTBOX_PENDING
+        assert email.recipient == 'queued_user@yamdb.fake'
+
+        call_command('process_outbox')
+        email.refresh_from_db()
+        assert email.status == OUTBOX_SENT and email.sent_at, (
+            'Проверьте, что команда `process_outbox` отправляет письма из '
+            'очереди и отмечает их отправленными.'
+        )
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert mail.outbox[-1].to == ['queued_user@yamdb.fake']
+
+    def test_02_failed_email_is_retried_with_backoff(self, client):
+        self.signup(client, 'retry_user')
+        with mock.patch.object(
+            EmailBackend, 'send_messages', side_effect=OSError('down')
+        ):
+            call_command('process_outbox', backoff=60, max_attempts=2)
+        email = EmailOutbox.objects.get()
+        assert email.status == OUTBOX_PENDING and email.attempts == 1, (
+            'Проверьте, что после ошибки отправки письмо остается в '
+            'очереди для повторной попытки.'
+        )
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная отправка откладывается.'
+        )
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        with mock.patch.object(
+            EmailBackend, 'send_messages', side_effect=OSError('down')
+        ):
+            call_command('process_outbox', backoff=60, max_attempts=2)
+        email.refresh_from_db()
+        assert email.status == OUTBOX_FAILED and email.attempts == 2, (
+            'Проверьте, что после исчерпания попыток письмо отмечается '
+            'как неотправленное.'
+        )
+
+    def test_03_emails_are_sent_outside_transaction(self, client):
+        self.signup(client, 'claimed_user')
+        states = []
+
+        def send_messages(messages):
+            email = EmailOutbox.objects.get()
+            states.append((connection.in_atomic_block, email.attempts,
+                           email.next_attempt_at > timezone.now()))
+            raise KeyboardInterrupt
+
+        with mock.patch.object(
+            EmailBackend, 'send_messages', side_effect=send_messages
+        ):
+            with pytest.raises(KeyboardInterrupt):
+                call_command('process_outbox')
+        assert states == [(False, 1, True)], (
+            'Проверьте, что `process_outbox` сначала забирает письмо в '
+            'короткой транзакции, откладывая следующую попытку, а '
+            'отправляет его вне транзакции.'
+        )
+
+        outbox_before_count = len(mail.outbox)
+        call_command('process_outbox')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо, взятое упавшим процессом, не '
+            'отправляется повторно до истечения --claim-timeout.'
+        )
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        call_command('process_outbox')
+        email = EmailOutbox.objects.get()
+        assert email.status == OUTBOX_SENT and email.attempts == 2
+        assert len(mail.outbox) == outbox_before_count + 1
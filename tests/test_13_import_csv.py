@@ -0,0 +1,188 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from reviews.models import Comment, Review, Title, User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(DATA_DIR, path)
+    return path
+
+
+def import_csv(data_dir, **options):
+    stdout, stderr = StringIO(), StringIO()
+    call_command('import_csv_to_db', data_dir=str(data_dir), stdout=stdout,
+                 stderr=stderr, **options)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ImportCsv:
+
+    def test_01_import_in_batches(self, data_dir):
+        stdout, stderr = import_csv(data_dir, batch_size=7)
+        assert not stderr
+        assert User.objects.count() == 5
+        assert Title.objects.count() == 32
+        assert Review.objects.count() == 72
+        assert Comment.objects.count() == 3
+        assert 'review.csv: 72 inserted, 0 skipped' in stdout, (
+            'Проверьте, что команда `import_csv_to_db` сообщает количество '
+            'загруженных и пропущенных строк.'
+        )
+        assert Title.objects.exclude(rating=None).exists(), (
+            'Проверьте, что после импорта пересчитываются рейтинги '
+            'произведений.'
+        )
+
+    def test_02_bad_rows_are_skipped(self, data_dir):
+        with open(data_dir / 'review.csv', 'a', encoding='utf-8') as file:
+            file.write(
+                '1000,1,"bad score",100,abc,2020-01-01T00:00:00Z\n'
+                '1001,1,"duplicate id",104,5,2020-01-01T00:00:00Z\n'
+                '1001,2,"good",104,7,2020-01-01T00:00:00Z\n'
+            )
+        stdout, stderr = import_csv(data_dir, batch_size=50)
+        assert Review.objects.count() == 73, (
+            'Проверьте, что ошибочные строки пропускаются по одной, а '
+            'остальные строки файла загружаются.'
+        )
+        assert Review.objects.filter(pk=1001, text='duplicate id').exists()
+        assert 'review.csv: 73 inserted, 2 skipped' in stdout
+        assert stderr.count('review.csv, строка') == 2, (
+            'Проверьте, что команда `import_csv_to_db` сообщает о каждой '
+            'пропущенной строке.'
+        )
+
+    def test_03_upsert_and_dry_run(self, data_dir):
+        import_csv(data_dir)
+        path = data_dir / 'review.csv'
+        with open(path, encoding='utf-8', newline='') as file:
+            content = file.read()
+        first_review = Review.objects.get(pk=1)
+        assert first_review.score == 10
+        content = content.replace(',100,10,2019-09-24T21:08:21.567Z',
+                                  ',100,2,2019-09-24T21:08:21.567Z', 1)
+        content += '1000,2,"new review",100,7,2020-01-01T00:00:00Z\n'
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+
+        stdout, _ = import_csv(data_dir, dry_run=True)
+        assert ('review.csv: 1 inserted, 1 updated, 71 unchanged, '
+                '0 skipped') in stdout, (
+            'Проверьте, что `import_csv_to_db --dry-run` сообщает '
+            'количество новых, измененных и неизмененных строк.'
+        )
+        assert 'users.csv: 0 inserted, 0 updated, 5 unchanged' in stdout
+        assert Review.objects.count() == 72, (
+            'Проверьте, что `import_csv_to_db --dry-run` ничего не '
+            'записывает в базу.'
+        )
+        assert Review.objects.get(pk=1).score == 10
+
+        stdout, stderr = import_csv(data_dir, upsert=True)
+        assert not stderr
+        assert ('review.csv: 1 inserted, 1 updated, 71 unchanged, '
+                '0 skipped') in stdout
+        assert Review.objects.count() == 73
+        assert Review.objects.get(pk=1).score == 2, (
+            'Проверьте, что `import_csv_to_db --upsert` обновляет '
+            'измененные строки.'
+        )
+        title = Title.objects.get(pk=first_review.title_id)
+        assert title.rating_sum == 12, (
+            'Проверьте, что после `import_csv_to_db --upsert` '
+            'пересчитываются рейтинги произведений.'
+        )
+
+    @pytest.mark.parametrize('upsert', (False, True))
+    def test_04_unknown_foreign_key_is_skipped(self, data_dir, upsert):
+        with open(data_dir / 'review.csv', 'a', encoding='utf-8') as file:
+            file.write(
+                '2000,99999,"bad fk",100,5,2020-01-01T00:00:00Z\n'
+                '2001,1,"good",104,7,2020-01-01T00:00:00Z\n'
+            )
+        stdout, stderr = import_csv(data_dir, batch_size=50, upsert=upsert)
+        assert Review.objects.count() == 73, (
+            'Проверьте, что строка со ссылкой на несуществующее произведение '
+            'пропускается, а остальные строки пачки загружаются.'
+        )
+        assert not Review.objects.filter(pk=2000).exists()
+        assert 'пропущена: title_id=99999 не найден' in stderr, (
+            'Проверьте, что команда `import_csv_to_db` сообщает о строке '
+            'с несуществующим внешним ключом.'
+        )
+        assert 'review.csv: 73 inserted' in stdout
+        assert 'Successfully load data' in stdout
+
+    def test_05_dry_run_on_empty_database(self, data_dir):
+        stdout, stderr = import_csv(data_dir, dry_run=True)
+        assert not stderr
+        for line in ('users.csv: 5 inserted', 'titles.csv: 32 inserted',
+                     'review.csv: 72 inserted, 0 updated, 0 unchanged, '
+                     '0 skipped',
+                     'comments.csv: 3 inserted, 0 updated, 0 unchanged, '
+                     '0 skipped'):
+            assert line in stdout, (
+                'Проверьте, что `import_csv_to_db --dry-run` на пустой базе '
+                'считает ссылки на строки, добавленные этим же запуском, '
+                f'существующими. Нет строки `{line}`:\n{stdout}'
+            )
+        assert not Review.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ExportDb:
+
+    def test_01_export_csv_round_trip(self, data_dir, tmp_path):
+        import_csv(data_dir)
+        output_dir = tmp_path / 'export'
+        call_command('export_db', output_dir=str(output_dir), chunk_size=10,
+                     stdout=StringIO())
+
+        for name in os.listdir(DATA_DIR):
+            tables = []
+            for path in (os.path.join(DATA_DIR, name), output_dir / name):
+                with open(path, encoding='utf-8', newline='') as file:
+                    reader = csv.DictReader(file)
+                    tables.append((reader.fieldnames, list(reader)))
+            (source_fields, source), (exported_fields, exported) = tables
+            assert exported_fields == source_fields
+            for row in source + exported:
+                row.pop('pub_date', None)
+            assert sorted(exported, key=lambda row: int(row['id'])) == sorted(
+                source, key=lambda row: int(row['id'])), (
+                f'Проверьте, что `export_db` выгружает `{name}` в том же '
+                'формате, что и файлы в static/data.'
+            )
+
+        Review.objects.all().delete()
+        call_command('import_csv_to_db', data_dir=str(output_dir),
+                     upsert=True, stdout=StringIO())
+        assert Review.objects.count() == 72
+
+    def test_02_export_jsonl_gzip(self, data_dir, tmp_path):
+        import_csv(data_dir)
+        output_dir = tmp_path / 'export'
+        call_command('export_db', output_dir=str(output_dir), format='jsonl',
+                     gzip=True, stdout=StringIO())
+
+        with gzip.open(output_dir / 'review.jsonl.gz', 'rt',
+                       encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        assert len(rows) == 72
+        assert set(rows[0]) == {
+            'id', 'title_id', 'text', 'author_id', 'score', 'pub_date'
+        }
+        assert rows[0]['pub_date'].endswith('Z')
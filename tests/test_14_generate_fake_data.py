@@ -0,0 +1,64 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from reviews.models import Comment, GenreTitle, Review, Title, User
+
+
+def generate(**options):
+    call_command('generate_fake_data', stdout=StringIO(), **options)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14GenerateFakeData:
+
+    def test_01_generate_dataset(self):
+        generate(users=20, titles=30, genres=5, categories=3,
+                 reviews_per_title=4, comments_per_review=1, seed=7,
+                 batch_size=16)
+        assert User.objects.count() == 20
+        assert Title.objects.count() == 30
+        assert GenreTitle.objects.exists()
+        reviews_per_title = sorted(
+            Review.objects.order_by().values('title')
+            .annotate(count=Count('pk'))
+            .values_list('count', flat=True), reverse=True)
+        assert reviews_per_title[0] > reviews_per_title[-1], (
+            'Проверьте, что `generate_fake_data` распределяет отзывы по '
+            'произведениям неравномерно.'
+        )
+        assert reviews_per_title[0] <= 20
+        assert Comment.objects.exists()
+        assert not Title.objects.filter(
+            reviews__isnull=False, rating=None).exists(), (
+            'Проверьте, что после генерации пересчитываются рейтинги.'
+        )
+
+    def test_02_same_seed_same_data(self):
+        generate(users=10, titles=10, seed=3)
+        first = list(Review.objects.order_by('pk').values_list(
+            'score', 'text'))
+        Review.objects.all().delete()
+        Title.objects.all().delete()
+        User.objects.all().delete()
+        generate(users=10, titles=10, seed=3)
+        second = list(Review.objects.order_by('pk').values_list(
+            'score', 'text'))
+        assert first == second, (
+            'Проверьте, что `generate_fake_data` с одинаковым `--seed` '
+            'генерирует одинаковые данные.'
+        )
+
+    @pytest.mark.parametrize('option', (
+        'genres_per_title', 'reviews_per_title', 'skew',
+        'comments_per_review',
+    ))
+    def test_03_negative_options_are_rejected(self, option):
+        with pytest.raises(CommandError, match='отрицательным'):
+            generate(users=5, titles=5, **{option: -1})
+        assert not User.objects.exists(), (
+            f'Проверьте, что `generate_fake_data` с отрицательным '
+            f'`--{option.replace("_", "-")}` завершается ошибкой до '
+            'генерации данных.'
+        )
@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+
+from tests.utils import (capture_queries, check_query_budget,
+                         create_comments, format_queries)
+
+QUERY_TIME_BUDGET = 0.5
+
+
+@pytest.fixture
+def dataset(admin_client, admin, user_client, user, moderator_client,
+            moderator):
+    author_map = {
+        admin: admin_client,
+        user: user_client,
+        moderator: moderator_client
+    }
+    comments, reviews, titles = create_comments(admin_client, author_map)
+    title_id, review_id = titles[0]['id'], reviews[0]['id']
+    reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+    comments_url = f'{reviews_url}{review_id}/comments/'
+    return {
+        'titles': titles,
+        'reviews_url': reviews_url,
+        'comments_url': comments_url,
+        'review_id': review_id,
+        'comment_id': comments[0]['id'],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15QueryBudget:
+
+    def test_01_list_queries_do_not_grow(self, client, admin_client,
+                                         dataset):
+        # url, клиент, параметры маленькой и большой страницы, бюджет
+        endpoints = (
+            ('/api/v1/categories/', client, '?limit=1', '?limit=2', 2),
+            ('/api/v1/genres/', client, '?limit=1', '?limit=3', 2),
+            ('/api/v1/titles/', client, '?limit=1', '?limit=2', 3),
+            (dataset['reviews_url'], client, '?limit=1', '?limit=3', 3),
+            (dataset['reviews_url'], client, '?cursor=&limit=1',
+             '?cursor=&limit=3', 2),
+            (dataset['comments_url'], client, '?limit=1', '?limit=3', 3),
+            (dataset['comments_url'], client, '?expand=review&limit=1',
+             '?expand=review&limit=3', 3),
+            ('/api/v1/users/', admin_client, '?search=TestAdmin', '', 3),
+        )
+        for url, api_client, small, large, budget in endpoints:
+            results = []
+            for params in (small, large):
+                response, queries = capture_queries(
+                    api_client, 'get', f'{url}{params}')
+                assert response.status_code == HTTPStatus.OK
+                results.append((len(response.json()['results']), queries))
+            (small_size, small_queries), (large_size, large_queries) = (
+                results)
+            assert small_size < large_size
+            assert len(small_queries) == len(large_queries), (
+                f'Проверьте, что количество SQL-запросов при GET-запросе к '
+                f'`{url}` не зависит от размера страницы. '
+                f'{small_size} объект(ов):\n{format_queries(small_queries)}'
+                f'\n{large_size} объект(ов):\n{format_queries(large_queries)}'
+            )
+            check_query_budget(large_queries, f'{url}{large}', 'GET',
+                               budget, QUERY_TIME_BUDGET)
+
+    def test_02_detail_queries_budget(self, client, admin_client, dataset):
+        endpoints = (
+            (f'/api/v1/titles/{dataset["titles"][0]["id"]}/', client, 2),
+            (f'{dataset["reviews_url"]}{dataset["review_id"]}/', client, 2),
+            (f'{dataset["comments_url"]}{dataset["comment_id"]}/', client,
+             2),
+            ('/api/v1/users/TestUser/', admin_client, 2),
+            ('/api/v1/users/me/', admin_client, 1),
+        )
+        for url, api_client, budget in endpoints:
+            response, queries = capture_queries(api_client, 'get', url)
+            assert response.status_code == HTTPStatus.OK
+            check_query_budget(queries, url, 'GET', budget,
+                               QUERY_TIME_BUDGET)
+
+    def test_03_create_queries_budget(self, client, admin_client,
+                                      user_client, user, dataset):
+        second_title = dataset['titles'][1]
+        token_data = {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        }
+        endpoints = (
+            ('/api/v1/categories/', admin_client,
+             {'name': 'Музыка', 'slug': 'music'}, 3),
+            ('/api/v1/genres/', admin_client,
+             {'name': 'Рок', 'slug': 'rock'}, 3),
+            ('/api/v1/titles/', admin_client, {
+                'name': 'Чужой', 'year': 1979, 'genre': ['horror', 'drama'],
+                'category': 'films'
+            }, 12),
+            (f'/api/v1/titles/{second_title["id"]}/reviews/', user_client,
+             {'text': 'Отзыв', 'score': 7}, 7),
+            (dataset['comments_url'], user_client, {'text': 'Коммент'}, 5),
+            ('/api/v1/users/', admin_client,
+             {'username': 'new_user', 'email': 'new_user@yamdb.fake'}, 4),
+            ('/api/v1/auth/signup/', client,
+             {'username': 'signup_user', 'email': 'signup@yamdb.fake'}, 4),
+            ('/api/v1/auth/token/', client, token_data, 1),
+        )
+        for url, api_client, data, budget in endpoints:
+            response, queries = capture_queries(
+                api_client, 'post', url, data)
+            assert response.status_code in (
+                HTTPStatus.OK, HTTPStatus.CREATED), response.json()
+            check_query_budget(queries, url, 'POST', budget,
+                               QUERY_TIME_BUDGET)
+
+    def test_04_nested_parents_loaded_once(self, user_client, dataset):
+        second_title = dataset['titles'][1]
+        for url, data, table in (
+            (f'/api/v1/titles/{second_title["id"]}/reviews/',
+             {'text': 'Отзыв', 'score': 7}, 'reviews_title'),
+            (dataset['comments_url'], {'text': 'Коммент'}, 'reviews_review'),
+        ):
+            response, queries = capture_queries(user_client, 'post', url, data)
+            assert response.status_code == HTTPStatus.CREATED
+            lookups = [query for query in queries
+                       if query['sql'].startswith('SELECT')
+                       and f'FROM "{table}"' in query['sql']]
+            assert len(lookups) == 1, (
+                f'Проверьте, что POST-запрос к `{url}` загружает родительский '
+                f'объект один раз:\n{format_queries(lookups)}'
+            )
@@ -0,0 +1,85 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def timing_client(settings):
+    settings.REQUEST_TIMING_ENABLED = True
+    settings.REQUEST_TIMING_SLOW_MS = 10 ** 6
+    return APIClient()
+
+
+def get_records(caplog, logger_name):
+    return [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == logger_name
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16RequestTiming:
+
+    def test_01_server_timing_header(self, timing_client, admin_client,
+                                     caplog):
+        _, _, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/?genre={genres[0]["slug"]}'
+        caplog.clear()
+        with caplog.at_level(logging.INFO, logger='api.timing'):
+            response = timing_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+
+        header = response.get('Server-Timing', '')
+        metrics = dict(
+            (part.split(';')[0].strip(), part) for part in header.split(',')
+        )
+        assert set(metrics) == {'db', 'view', 'serializer', 'render',
+                                'total'}, (
+            'Проверьте, что при включенном REQUEST_TIMING_ENABLED ответ '
+            'содержит заголовок `Server-Timing` с метриками db, view, '
+            f'serializer, render и total. Сейчас: `{header}`'
+        )
+        assert '3 queries' in metrics['db']
+
+        records = get_records(caplog, 'api.timing')
+        assert len(records) == 1, (
+            'Проверьте, что для каждого запроса в лог `api.timing` '
+            'пишется одна строка JSON.'
+        )
+        record = records[0]
+        assert record['path'] == url
+        assert record['view'] == 'titles-list'
+        assert record['status'] == HTTPStatus.OK
+        assert record['queries'] == 3
+        assert record['response_bytes'] == len(response.content)
+        for name in ('db_ms', 'view_ms', 'render_ms', 'total_ms'):
+            assert record[name] >= 0
+        assert 0 < record['serializer_ms'] <= record['view_ms'], (
+            'Проверьте, что время serializer.data замеряется отдельно и '
+            'входит во время view.'
+        )
+        assert not get_records(caplog, 'api.timing.slow')
+
+    def test_02_slow_request_log(self, timing_client, settings, caplog):
+        settings.REQUEST_TIMING_SLOW_MS = 0
+        with caplog.at_level(logging.INFO, logger='api.timing'):
+            timing_client.get('/api/v1/categories/')
+        records = get_records(caplog, 'api.timing.slow')
+        assert len(records) == 1, (
+            'Проверьте, что запросы дольше REQUEST_TIMING_SLOW_MS пишутся '
+            'в лог `api.timing.slow`.'
+        )
+        assert len(records[0]['sql']) == records[0]['queries'] == 1
+        assert 'reviews_category' in records[0]['sql'][0]['sql']
+
+    def test_03_disabled_by_default(self, client):
+        response = client.get('/api/v1/categories/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что без REQUEST_TIMING_ENABLED заголовок '
+            '`Server-Timing` не добавляется.'
+        )
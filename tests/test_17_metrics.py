@@ -0,0 +1,133 @@
+import os
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from api.metrics import registry, write_samples
+from django.conf import settings
+from django.core.management import call_command
+from reviews.models import EmailOutbox
+
+from tests.utils import create_titles
+
+URL = '/api/metrics'
+TOKEN = 'metrics-token'
+
+
+@pytest.fixture(autouse=True)
+def enable_metrics(settings):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_TOKEN = TOKEN
+
+
+@pytest.fixture
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path / 'metrics')
+    registry.reset()
+    yield settings.METRICS_DIR
+    registry.reset()
+
+
+def get_metrics(client):
+    response = client.get(URL, HTTP_AUTHORIZATION=f'Bearer {TOKEN}')
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{URL}` с токеном METRICS_TOKEN '
+        'возвращает ответ со статусом 200.'
+    )
+    assert response['Content-Type'].startswith('text/plain')
+    return response.content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Metrics:
+
+    def test_01_request_metrics(self, client, admin_client, metrics_dir):
+        create_titles(admin_client)
+        for limit in range(1, 4):
+            client.get(f'/api/v1/titles/?limit={limit}')
+        client.get('/api/v1/titles/100500/')
+        EmailOutbox.objects.create(
+            subject='s', message='m', from_email='a@yamdb.fake',
+            recipient='b@yamdb.fake')
+
+        text = get_metrics(client)
+        for line in (
+            'yamdb_http_requests_total{method="GET",status="200",'
+            'view="TitleViewSet.list"} 3',
+            'yamdb_http_requests_total{method="GET",status="404",'
+            'view="TitleViewSet.retrieve"} 1',
+            'yamdb_http_requests_total{method="POST",status="201",'
+            'view="TitleViewSet.create"} 2',
+            'yamdb_http_request_duration_seconds_bucket{le="+Inf",'
+            'view="TitleViewSet.list"} 3',
+            'yamdb_http_request_duration_seconds_count'
+            '{view="TitleViewSet.list"} 3',
+            'yamdb_db_queries_total{view="TitleViewSet.list"} 9',
+            'yamdb_email_outbox_messages{status="pending"} 1',
+            '# TYPE yamdb_http_request_duration_seconds histogram',
+        ):
+            assert line in text, (
+                f'Проверьте, что ответ `{URL}` содержит строку `{line}`.'
+            )
+        assert os.listdir(metrics_dir), (
+            'Проверьте, что метрики процесса сохраняются в METRICS_DIR.'
+        )
+
+    def test_02_workers_are_summed(self, client, metrics_dir):
+        client.get('/api/v1/categories/')
+        key = ('yamdb_http_requests_total', (
+            ('method', 'GET'), ('status', '200'),
+            ('view', 'CategoryViewSet.list')))
+        write_samples(f'worker-{os.getppid()}-1', {key: 4})
+        text = get_metrics(client)
+        assert ('yamdb_http_requests_total{method="GET",status="200",'
+                'view="CategoryViewSet.list"} 5') in text, (
+            f'Проверьте, что `{URL}` складывает метрики всех процессов из '
+            'METRICS_DIR.'
+        )
+
+    def test_03_token_required(self, client, settings):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            response = client.get(URL, REMOTE_ADDR='127.0.0.1', **headers)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что `{URL}` недоступен без токена '
+                'METRICS_TOKEN, в том числе с 127.0.0.1.'
+            )
+        settings.METRICS_TOKEN = None
+        response = client.get(URL, HTTP_AUTHORIZATION='Bearer None')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что без METRICS_TOKEN `{URL}` выключен.'
+        )
+
+    def test_04_import_progress(self, client, metrics_dir):
+        call_command(
+            'import_csv_to_db',
+            data_dir=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            stdout=StringIO())
+        text = get_metrics(client)
+        assert ('yamdb_import_rows{result="inserted",table="review.csv"} 72'
+                in text), (
+            f'Проверьте, что `{URL}` показывает прогресс `import_csv_to_db`.'
+        )
+        assert 'yamdb_import_running 0' in text
+
+    def test_05_dead_workers_are_pruned(self, client, metrics_dir):
+        client.get('/api/v1/categories/')
+        key = ('yamdb_http_requests_total', (
+            ('method', 'GET'), ('status', '200'),
+            ('view', 'CategoryViewSet.list')))
+        # Несуществующий PID и прежний процесс с тем же PID, что у
+        # текущего, но с более ранним временем запуска.
+        write_samples('worker-999999999-1', {key: 10})
+        write_samples(f'worker-{os.getpid()}-1', {key: 100})
+        text = get_metrics(client)
+        assert ('yamdb_http_requests_total{method="GET",status="200",'
+                'view="CategoryViewSet.list"} 1') in text, (
+            f'Проверьте, что `{URL}` не учитывает файлы завершившихся '
+            'процессов.'
+        )
+        assert sorted(os.listdir(metrics_dir)) == [
+            f'worker-{os.getpid()}-{registry.started}.json'], (
+            'Проверьте, что файлы завершившихся процессов удаляются из '
+            'METRICS_DIR.'
+        )
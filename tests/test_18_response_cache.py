@@ -0,0 +1,130 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from api.cache import get_versions
+from django.db import connection, transaction
+from reviews.models import Category, Genre, Review, Title
+
+from tests.utils import capture_queries, create_reviews, create_titles
+
+
+def get_cached(client, url):
+    response, queries = capture_queries(client, 'get', url)
+    assert response.status_code == HTTPStatus.OK
+    return response.json(), queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ResponseCache:
+
+    def test_01_lists_are_cached(self, client, admin_client):
+        create_titles(admin_client)
+        for url in ('/api/v1/categories/', '/api/v1/genres/',
+                    '/api/v1/titles/'):
+            data, _ = get_cached(client, url)
+            cached, queries = get_cached(client, url)
+            assert cached == data
+            assert not queries, (
+                f'Проверьте, что повторный GET-запрос к `{url}` отдается из '
+                'кэша без запросов к базе данных.'
+            )
+
+    def test_02_query_string_is_normalized(self, client, admin_client):
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+        data, _ = get_cached(client, f'{url}?year=1984&genre=horror&limit=1')
+        cached, queries = get_cached(
+            client, f'{url}?limit=1&genre=horror&year=1984')
+        assert cached == data and not queries, (
+            f'Проверьте, что ключ кэша `{url}` не зависит от порядка '
+            'параметров запроса.'
+        )
+        other, queries = get_cached(client, f'{url}?year=1988')
+        assert queries, (
+            f'Проверьте, что ключ кэша `{url}` учитывает параметры '
+            'фильтрации.'
+        )
+        assert [title['year'] for title in other['results']] == [1988]
+
+    def test_03_changes_invalidate_cache(self, client, admin_client, admin,
+                                         user_client, user):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        def get_title(title_id):
+            data, _ = get_cached(client, f'{url}?limit=10')
+            return next(
+                item for item in data['results'] if item['id'] == title_id)
+
+        title_id = titles[0]['id']
+        assert get_title(title_id)['rating'] is None
+        user_client.post(f'{url}{title_id}/reviews/',
+                         data={'text': 'Отзыв', 'score': 8})
+        assert get_title(title_id)['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кэш списка произведений.'
+        )
+
+        genre = Genre.objects.get(slug=genres[0]['slug'])
+        genre.name = 'Хоррор'
+        genre.save()
+        assert 'Хоррор' in [
+            item['name'] for item in get_title(title_id)['genre']], (
+            'Проверьте, что изменение жанра сбрасывает кэш списка '
+            'произведений.'
+        )
+        Title.objects.get(pk=title_id).genre.add(
+            Genre.objects.get(slug=genres[2]['slug']))
+        assert len(get_title(title_id)['genre']) == 3, (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш '
+            'списка произведений.'
+        )
+
+        admin_client.delete(f'/api/v1/categories/{categories[1]["slug"]}/')
+        data, _ = get_cached(client, '/api/v1/categories/')
+        assert [item['slug'] for item in data['results']] == [
+            categories[0]['slug']], (
+            'Проверьте, что удаление категории сбрасывает кэш списка '
+            'категорий.'
+        )
+        assert Category.objects.count() == 1
+
+    def test_04_review_text_keeps_titles_cache(self, admin_client, admin,
+                                               user_client, user):
+        create_reviews(admin_client, {user: user_client})
+        version = get_versions('titles')['titles']
+        review = Review.objects.get()
+        review.text = 'Новый текст'
+        review.save()
+        assert get_versions('titles')['titles'] == version, (
+            'Проверьте, что изменение текста отзыва без изменения оценки не '
+            'сбрасывает кэш списка произведений.'
+        )
+        review.score = 1
+        review.save()
+        assert get_versions('titles')['titles'] != version
+
+    def test_05_read_during_write_transaction(self, client, admin_client,
+                                              user):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        def rating():
+            data, _ = get_cached(client, url)
+            return next(title['rating'] for title in data['results']
+                        if title['id'] == titles[0]['id'])
+
+        def read_in_other_connection():
+            rating()
+            connection.close()
+
+        with transaction.atomic():
+            Review.objects.create(
+                title_id=titles[0]['id'], author=user, text='Отзыв', score=1)
+            thread = threading.Thread(target=read_in_other_connection)
+            thread.start()
+            thread.join()
+        assert rating() == 1, (
+            f'Проверьте, что ответ `{url}`, прочитанный до фиксации '
+            'транзакции записи, не сохраняется в кэше под новой версией.'
+        )
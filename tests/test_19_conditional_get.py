@@ -0,0 +1,165 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, transaction
+from reviews.models import Review, Title
+
+from tests.utils import (capture_queries, create_comments,
+                         create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ConditionalGet:
+
+    def test_01_list_validators(self, client, admin_client):
+        create_titles(admin_client)
+        url = '/api/v1/categories/'
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        assert 'public' in response['Cache-Control'], (
+            f'Проверьте, что ответ на анонимный GET-запрос к `{url}` можно '
+            'кэшировать: `Cache-Control: public`.'
+        )
+        assert 'Authorization' in response['Vary']
+
+        response, queries = capture_queries(
+            client, 'get', url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert not response.content
+        assert response['ETag'] == etag
+        assert not queries, (
+            'Проверьте, что ответ 304 отдается без запросов к базе данных.'
+        )
+
+        admin_client.post(url, data={'name': 'Музыка', 'slug': 'music'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после изменения данных GET-запрос к `{url}` со '
+            'старым `If-None-Match` возвращает ответ со статусом 200.'
+        )
+        assert response['ETag'] != etag
+
+    def test_02_nested_validators(self, client, admin_client, admin,
+                                  user_client, user, moderator_client,
+                                  moderator):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client})
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        etags = {}
+        for url in (reviews_url, comments_url,
+                    f'{comments_url}?expand=review'):
+            response = client.get(url)
+            etags[url] = response['ETag']
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+                '`If-None-Match` возвращает ответ со статусом 304.'
+            )
+
+        response = client.get(
+            reviews_url,
+            HTTP_IF_MODIFIED_SINCE=client.get(reviews_url)['Last-Modified'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{reviews_url}` с '
+            '`If-Modified-Since` возвращает ответ со статусом 304.'
+        )
+        response = user_client.get(reviews_url)
+        assert 'private' in response['Cache-Control'], (
+            'Проверьте, что ответы авторизованным пользователям помечаются '
+            '`Cache-Control: private`.'
+        )
+
+        create_single_comment(moderator_client, title_id, review_id, 'new')
+        response = client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=etags[reviews_url])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет `ETag` отзывов: в них '
+            'выводится `comment_count`.'
+        )
+        for url in (comments_url, f'{comments_url}?expand=review'):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что новый комментарий меняет `ETag` `{url}`.'
+            )
+
+        create_single_review(moderator_client, title_id, 'new', 3)
+        response = client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=etags[reviews_url])
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что новый отзыв меняет `ETag` `{reviews_url}`.'
+        )
+        etag = response['ETag']
+
+        user.username = 'RenamedUser'
+        user.save()
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора меняет `ETag` отзывов.'
+        )
+
+        etag = response['ETag']
+        Title.objects.filter(pk=title_id).delete()
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что для удаленного произведения GET-запрос к его '
+            'отзывам возвращает 404, а не 304.'
+        )
+
+    def test_03_read_during_write_transaction(self, client, admin_client,
+                                              user):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        responses = []
+
+        def read_in_other_connection():
+            responses.append(client.get(url))
+            connection.close()
+
+        with transaction.atomic():
+            Review.objects.create(
+                title_id=titles[0]['id'], author=user, text='Отзыв', score=1)
+            thread = threading.Thread(target=read_in_other_connection)
+            thread.start()
+            thread.join()
+        assert responses[0].json()['rating'] is None
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=responses[0]['ETag'])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что версия меняется после фиксации транзакции: ETag '
+            'ответа, прочитанного до фиксации, не должен совпадать с ETag '
+            'новых данных.'
+        )
+        assert response.json()['rating'] == 1
+
+    def test_04_title_rename_changes_review_etags(self, client, admin_client,
+                                                  user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(
+            user_client, title_id, 'Отзыв', 7).json()
+        for url in (f'/api/v1/titles/{title_id}/reviews/',
+                    f'/api/v1/titles/{title_id}/reviews/{review["id"]}/'):
+            etag = client.get(url)['ETag']
+            response = admin_client.patch(
+                f'/api/v1/titles/{title_id}/', data={'name': url})
+            assert response.status_code == HTTPStatus.OK
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что переименование произведения меняет `ETag` '
+                f'`{url}`: в отзывах выводится название произведения.'
+            )
+            assert response['ETag'] != etag
+            data = response.json()
+            data = data['results'][0] if 'results' in data else data
+            assert data['title'] == url
@@ -0,0 +1,126 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from reviews.models import Review, Title
+
+from tests.utils import capture_queries, create_reviews, create_titles
+
+SEARCH_URL = '/api/v1/search/'
+
+
+def title_names(response):
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Search:
+
+    def test_01_titles_search_param(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Терминатор 2',
+            'year': 1991,
+            'genre': ['horror'],
+            'category': 'films',
+            'description': 'Судный день',
+        })
+        url = '/api/v1/titles/'
+
+        assert title_names(client.get(f'{url}?search=терминатор')) == [
+            'Терминатор 2', 'Терминатор'], (
+            f'Проверьте, что `{url}?search=` ищет по названию без учета '
+            'регистра.'
+        )
+        assert title_names(client.get(f'{url}?search=yippie')) == [
+            'Крепкий орешек'], (
+            f'Проверьте, что `{url}?search=` ищет по описанию.'
+        )
+        assert title_names(client.get(f'{url}?search=судн')) == [
+            'Терминатор 2'], (
+            f'Проверьте, что `{url}?search=` находит слова по началу.'
+        )
+        assert title_names(
+            client.get(f'{url}?search=терминатор&year=1984')
+        ) == ['Терминатор']
+        for query in ('"', 'терминатор OR', '*', 'NEAR(', '-орешек'):
+            response = client.get(f'{url}?search={query}')
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что `{url}?search={query}` не приводит к ошибке '
+                'разбора запроса.'
+            )
+
+        title = Title.objects.get(pk=titles[1]['id'])
+        title.name = 'Die Hard'
+        title.save()
+        assert title_names(client.get(f'{url}?search=орешек')) == []
+        assert title_names(client.get(f'{url}?search=die')) == ['Die Hard'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+        title.delete()
+        assert title_names(client.get(f'{url}?search=die')) == []
+
+    def test_02_name_outranks_description(self, client, admin_client):
+        create_titles(admin_client)
+        for name, description in (('Орешки', 'Сказка про назад'),
+                                  ('Назад в будущее', 'Фильм')):
+            admin_client.post('/api/v1/titles/', data={
+                'name': name, 'year': 1985, 'genre': ['comedy'],
+                'category': 'films', 'description': description,
+            })
+        response = client.get(f'{SEARCH_URL}?q=назад&type=titles')
+        assert title_names_in(response, 'titles') == [
+            'Назад в будущее', 'Орешки'], (
+            f'Проверьте, что `{SEARCH_URL}` ставит совпадения в названии '
+            'выше совпадений в описании.'
+        )
+
+    def test_03_search_endpoint(self, client, admin_client, admin,
+                                user_client, user):
+        create_reviews(admin_client, {admin: admin_client, user: user_client})
+        Review.objects.filter(author=user).update(
+            text='Лучший фильм про машины')
+        response = client.get(f'{SEARCH_URL}?q=машины')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{SEARCH_URL}` не найден или недоступен анониму.'
+        )
+        data = response.json()
+        assert set(data) == {'titles', 'reviews'}
+        assert data['titles'] == []
+        assert [review['text'] for review in data['reviews']] == [
+            'Лучший фильм про машины'], (
+            f'Проверьте, что `{SEARCH_URL}` ищет по тексту отзывов.'
+        )
+        assert data['reviews'][0]['author'] == user.username
+        assert data['reviews'][0]['title_id']
+
+        response = client.get(SEARCH_URL)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что GET-запрос к `{SEARCH_URL}` без параметра `q` '
+            'возвращает ответ со статусом 400.'
+        )
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite',
+                        reason='План запроса проверяется только для SQLite')
+    def test_04_search_uses_fts_index(self, client, admin_client):
+        create_titles(admin_client)
+        _, queries = capture_queries(
+            client, 'get', '/api/v1/titles/?search=терминатор&limit=5')
+        sql = next(query['sql'] for query in queries
+                   if 'MATCH' in query['sql'] and 'COUNT' not in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        assert 'VIRTUAL TABLE INDEX' in plan, (
+            'Проверьте, что `?search=` использует индекс FTS5. План:\n'
+            f'{plan}'
+        )
+        assert 'SCAN reviews_title' not in plan.replace(
+            'SCAN reviews_title_fts', ''), plan
+
+
+def title_names_in(response, key):
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()[key]]
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from reviews.models import Review
+
+from tests.utils import capture_queries, create_single_review, create_titles
+
+TOP_URL = '/api/v1/titles/top/'
+TRENDING_URL = '/api/v1/titles/trending/'
+
+
+def title_names(response):
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()]
+
+
+@pytest.fixture
+def leaderboard(admin_client, user_client, moderator_client, settings):
+    """Три произведения: одна оценка 10, три оценки 9 и три оценки 2."""
+    settings.LEADERBOARD_PRIOR_VOTES = 2
+    titles, _, _ = create_titles(admin_client)
+    response = admin_client.post('/api/v1/titles/', data={
+        'name': 'Плохой фильм', 'year': 2000, 'genre': ['drama'],
+        'category': 'films',
+    })
+    titles.append({'id': response.json()['id']})
+    create_single_review(user_client, titles[0]['id'], 'Шедевр', 10)
+    for client in (admin_client, user_client, moderator_client):
+        create_single_review(client, titles[1]['id'], 'Хорошо', 9)
+        create_single_review(client, titles[2]['id'], 'Плохо', 2)
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Leaderboard:
+
+    def test_01_top_uses_weighted_rating(self, client, leaderboard):
+        call_command('refresh_leaderboard')
+        response = client.get(TOP_URL)
+        assert title_names(response) == [
+            'Крепкий орешек', 'Терминатор', 'Плохой фильм'], (
+            f'Проверьте, что `{TOP_URL}` сортирует произведения по '
+            'взвешенному рейтингу и произведение с единственной оценкой не '
+            'обгоняет произведение с несколькими высокими оценками.'
+        )
+        data = response.json()
+        assert data[0]['rating'] == 9
+        assert data[0]['weighted_rating'] > data[1]['weighted_rating']
+        assert data[0]['recent_reviews'] == 3
+
+        assert title_names(client.get(f'{TOP_URL}?category=films')) == [
+            'Терминатор', 'Плохой фильм'], (
+            f'Проверьте, что `{TOP_URL}?category=` фильтрует по категории.'
+        )
+        assert title_names(client.get(f'{TOP_URL}?genre=drama')) == [
+            'Крепкий орешек', 'Плохой фильм'], (
+            f'Проверьте, что `{TOP_URL}?genre=` фильтрует по жанру.'
+        )
+        assert title_names(client.get(f'{TOP_URL}?limit=1')) == [
+            'Крепкий орешек']
+        response = client.get(f'{TOP_URL}?limit=0')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_trending(self, client, leaderboard):
+        assert title_names(client.get(TRENDING_URL)) == [
+            'Крепкий орешек', 'Плохой фильм', 'Терминатор'], (
+            f'Проверьте, что `{TRENDING_URL}` сортирует произведения по '
+            'числу недавних отзывов.'
+        )
+        Review.objects.filter(title_id=leaderboard[1]['id']).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        call_command('refresh_leaderboard')
+        assert title_names(client.get(TRENDING_URL)) == [
+            'Плохой фильм', 'Терминатор'], (
+            'Проверьте, что команда refresh_leaderboard исключает из '
+            'трендов старые отзывы.'
+        )
+
+    def test_03_incremental_updates(self, client, admin_client, leaderboard):
+        title_id = leaderboard[0]['id']
+        response = admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'category': 'books'})
+        assert response.status_code == HTTPStatus.OK
+        assert 'Терминатор' in title_names(
+            client.get(f'{TOP_URL}?category=books')), (
+            'Проверьте, что смена категории произведения обновляет топ '
+            'категории.'
+        )
+
+        def weighted_rating():
+            return next(title['weighted_rating']
+                        for title in client.get(TOP_URL).json()
+                        if title['id'] == title_id)
+
+        before = weighted_rating()
+        review = Review.objects.get(title_id=title_id)
+        review.score = 1
+        review.save()
+        assert weighted_rating() < before, (
+            'Проверьте, что изменение оценки сразу обновляет взвешенный '
+            'рейтинг.'
+        )
+        review.delete()
+        assert 'Терминатор' not in title_names(client.get(TOP_URL))
+        assert 'Терминатор' not in title_names(client.get(TRENDING_URL)), (
+            'Проверьте, что удаление отзыва сразу обновляет тренды.'
+        )
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite',
+                        reason='План запроса проверяется только для SQLite')
+    def test_04_top_uses_leaderboard_index(self, client, leaderboard):
+        for url, index in ((TOP_URL, 'leaderboard_top_idx'),
+                           (f'{TOP_URL}?category=films',
+                            'leaderboard_category_top_idx'),
+                           (TRENDING_URL, 'leaderboard_trending_idx')):
+            _, queries = capture_queries(client, 'get', url)
+            sql = next(query['sql'] for query in queries
+                       if 'reviews_titleleaderboard' in query['sql'])
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = '\n'.join(row[-1] for row in cursor.fetchall())
+            assert index in plan and 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что `{url}` читает топ по индексу `{index}` '
+                f'без сортировки всего каталога. План:\n{plan}'
+            )
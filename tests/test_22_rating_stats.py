@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Review, TitleRatingStats
+
+from tests.utils import capture_queries, create_single_review, create_titles
+
+
+def rating_stats_url(title_id):
+    return f'/api/v1/titles/{title_id}/rating-stats/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22RatingStats:
+
+    def test_01_rating_stats(self, client, admin_client, user_client,
+                             moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = rating_stats_url(title_id)
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` не найден или недоступен анониму.'
+        )
+        assert response.json() == {
+            'count': 0, 'mean': None, 'median': None,
+            'histogram': {str(score): 0 for score in range(1, 11)},
+        }
+
+        for api_client, score in ((admin_client, 2), (user_client, 9),
+                                  (moderator_client, 10)):
+            create_single_review(api_client, title_id, 'Отзыв', score)
+        response, queries = capture_queries(client, 'get', url)
+        data = response.json()
+        assert (data['count'], data['mean'], data['median']) == (
+            3, 7.0, 9.0), (
+            f'Проверьте, что `{url}` возвращает число оценок, среднюю и '
+            'медиану.'
+        )
+        assert data['histogram'] == {
+            str(score): int(score in (2, 9, 10)) for score in range(1, 11)}
+        assert len(queries) == 1, (
+            f'Проверьте, что `{url}` читает готовые счетчики одним запросом.'
+        )
+
+        review = Review.objects.get(title_id=title_id, score=2)
+        review.score = 9
+        review.save()
+        data = client.get(url).json()
+        assert data['histogram']['2'] == 0 and data['histogram']['9'] == 2, (
+            'Проверьте, что изменение оценки переносит ее в другой столбец '
+            'гистограммы.'
+        )
+        assert data['median'] == 9.0
+        Review.objects.filter(title_id=title_id, score=10).delete()
+        data = client.get(url).json()
+        assert (data['count'], data['mean'], data['median']) == (2, 9.0, 9.0)
+
+        for pk in (titles[1]['id'] + 100, 'abc'):
+            response = client.get(rating_stats_url(pk))
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что `{rating_stats_url(pk)}` для '
+                'несуществующего произведения возвращает 404.'
+            )
+
+    def test_02_expand_rating_stats(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 4)
+        url = '/api/v1/titles/'
+        results = client.get(url).json()['results']
+        assert all('rating_stats' not in title for title in results)
+
+        response, queries = capture_queries(
+            client, 'get', f'{url}?expand=rating_stats')
+        results = {title['id']: title for title in response.json()['results']}
+        stats = results[titles[0]['id']]['rating_stats']
+        assert stats['histogram']['4'] == 1, (
+            f'Проверьте, что `{url}?expand=rating_stats` встраивает '
+            'распределение оценок в произведение.'
+        )
+        assert results[titles[1]['id']]['rating_stats']['count'] == 0
+        assert len(queries) == 3, (
+            'Проверьте, что счетчики оценок загружаются через '
+            'select_related, а не отдельным запросом на каждое произведение.'
+        )
+        response = client.get(
+            f'{url}{titles[0]["id"]}/?expand=rating_stats')
+        assert response.json()['rating_stats']['mean'] == 4.0
+
+    def test_03_recompute_ratings(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 6)
+        TitleRatingStats.objects.all().delete()
+        call_command('recompute_ratings')
+        stats = TitleRatingStats.objects.get(title_id=titles[0]['id'])
+        assert stats.histogram[6] == 1 and stats.count == 1, (
+            'Проверьте, что команда recompute_ratings восстанавливает '
+            'счетчики оценок.'
+        )
@@ -0,0 +1,128 @@
+from http import HTTPStatus
+
+import pytest
+from api.authentication import RoleAccessToken
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+from tests.utils import capture_queries
+
+
+def get_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def auth_queries(queries, user):
+    return [query['sql'] for query in queries
+            if 'FROM "reviews_user"' in query['sql']
+            and f'"reviews_user"."id" = {user.pk}' in query['sql']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23StatelessJwt:
+
+    def test_01_token_claims(self, client, admin):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': admin.username,
+            'confirmation_code': default_token_generator.make_token(admin),
+        })
+        assert response.status_code == HTTPStatus.OK
+        token = AccessToken(response.json().split()[-1])
+        claims = (token['username'], token['role'], token['is_superuser'],
+                  token['token_version'])
+        assert claims == (admin.username, 'admin', False, 0), (
+            'Проверьте, что токен содержит username, role, is_superuser и '
+            'token_version.'
+        )
+
+    def test_02_no_user_query(self, admin):
+        url = '/api/v1/users/'
+        client = get_client(RoleAccessToken.for_user(admin))
+        assert client.get(url).status_code == HTTPStatus.OK
+        response, queries = capture_queries(client, 'get', url)
+        assert response.status_code == HTTPStatus.OK
+        assert not auth_queries(queries, admin), (
+            'Проверьте, что при актуальной версии токена пользователь не '
+            'загружается из базы.'
+        )
+
+        response, queries = capture_queries(client, 'get', '/api/v1/users/me/')
+        assert response.json()['bio'] == 'admin bio', (
+            'Проверьте, что остальные поля пользователя загружаются из базы '
+            'при обращении к ним.'
+        )
+        assert len(queries) == 1
+
+        legacy_client = get_client(AccessToken.for_user(admin))
+        response, queries = capture_queries(legacy_client, 'get', url)
+        assert response.status_code == HTTPStatus.OK
+        assert auth_queries(queries, admin)
+
+    def test_03_role_change(self, admin, settings):
+        url = '/api/v1/users/'
+        client = get_client(RoleAccessToken.for_user(admin))
+        assert client.get(url).status_code == HTTPStatus.OK
+
+        admin.role = 'user'
+        admin.save()
+        assert client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что после смены роли старый токен не дает прежних '
+            'прав.'
+        )
+        admin.role = 'admin'
+        admin.save()
+        assert client.get(url).status_code == HTTPStatus.OK
+
+        client = get_client(RoleAccessToken.for_user(
+            User.objects.get(pk=admin.pk)))
+        assert client.get(url).status_code == HTTPStatus.OK
+        User.objects.filter(pk=admin.pk).update(
+            role='user', token_version=F('token_version') + 1)
+        assert client.get(url).status_code == HTTPStatus.OK, (
+            'В пределах JWT_TOKEN_VERSION_TTL версия токенов берется из кэша.'
+        )
+        settings.JWT_TOKEN_VERSION_TTL = 0
+        assert client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что по истечении JWT_TOKEN_VERSION_TTL версия '
+            'токенов перечитывается из базы.'
+        )
+
+    def test_04_inactive_user(self, user):
+        client = get_client(RoleAccessToken.for_user(user))
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        user.is_active = False
+        user.save()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен заблокированного пользователя не '
+            'принимается.'
+        )
+
+    def test_05_user_save_reads_previous_row_once(self, admin):
+        stale = User.objects.get(pk=admin.pk)
+        admin.role = 'user'
+        with CaptureQueriesContext(connection) as context:
+            admin.save()
+        selects = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('SELECT')]
+        assert len(selects) == 1, (
+            'Проверьте, что при сохранении пользователя прежние данные '
+            'читаются из базы одним запросом.\n' + '\n'.join(selects)
+        )
+        assert admin.token_version == 1
+
+        token = RoleAccessToken.for_user(User.objects.get(pk=admin.pk))
+        assert token['token_version'] == 1
+        stale.role = 'moderator'
+        stale.save()
+        assert User.objects.get(pk=admin.pk).token_version == 2, (
+            'Проверьте, что сохранение устаревшего объекта пользователя не '
+            'возвращает прежнюю версию токенов.'
+        )
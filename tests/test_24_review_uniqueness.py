@@ -0,0 +1,101 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.db.models.signals import pre_save
+from rest_framework.test import APIClient
+from reviews.models import Review, Title
+
+from tests.utils import capture_queries, create_titles
+
+DUPLICATE_ERROR = ('На одно произведение пользователь может'
+                   'оставить только один отзыв.')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24ReviewUniqueness:
+
+    def test_01_duplicate_review(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        response, queries = capture_queries(user_client, 'post', url, data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert not any('SELECT (1) AS "a"' in query['sql']
+                       for query in queries), (
+            'Проверьте, что уникальность отзыва проверяется ограничением '
+            'базы данных без отдельного запроса exists().'
+        )
+
+        response = user_client.post(url, data={'text': 'Еще', 'score': 1})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'non_field_errors': [DUPLICATE_ERROR]}, (
+            'Проверьте, что повторный отзыв возвращает прежнюю ошибку '
+            'валидации.'
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (7, 1), (
+            'Проверьте, что отклоненный отзыв не меняет рейтинг.'
+        )
+
+    def test_02_duplicate_inserted_concurrently(self, admin_client,
+                                                user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+
+        def create_in_other_connection():
+            Review.objects.create(
+                title_id=title_id, author=user, text='Первый', score=3)
+            connection.close()
+
+        def insert_competitor(sender, instance, **kwargs):
+            # Параллельный запрос в другом соединении сохраняет отзыв
+            # прямо перед INSERT этого запроса.
+            pre_save.disconnect(insert_competitor, sender=Review)
+            thread = threading.Thread(target=create_in_other_connection)
+            thread.start()
+            thread.join()
+
+        pre_save.connect(insert_competitor, sender=Review)
+        try:
+            response = user_client.post(
+                f'/api/v1/titles/{title_id}/reviews/',
+                data={'text': 'Второй', 'score': 9})
+        finally:
+            pre_save.disconnect(insert_competitor, sender=Review)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что при одновременной отправке двух отзывов второй '
+            'получает ответ со статусом 400, а не 500.'
+        )
+        assert list(Review.objects.values_list('text', flat=True)) == [
+            'Первый']
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (3, 1)
+
+    @pytest.mark.skipif(connection.vendor == 'sqlite',
+                        reason='SQLite не поддерживает параллельную запись')
+    def test_03_parallel_requests(self, admin_client, token_user):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        barrier = threading.Barrier(5)
+        statuses = []
+
+        def submit():
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}')
+            barrier.wait()
+            statuses.append(
+                client.post(url, data={'text': 'Отзыв', 'score': 5})
+                .status_code)
+            connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(statuses) == (
+            [HTTPStatus.CREATED] + [HTTPStatus.BAD_REQUEST] * 4), statuses
+        assert Review.objects.count() == 1
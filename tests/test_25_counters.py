@@ -0,0 +1,107 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models.signals import post_delete, post_save
+from reviews.models import Comment, Review, Title
+
+from tests.utils import (capture_queries, create_comments,
+                         create_single_comment)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Counters:
+
+    def test_01_counters_in_responses(self, client, admin_client, admin,
+                                      user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client})
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json()['review_count'] == 2, (
+            'Проверьте, что произведение содержит поле `review_count`.'
+        )
+        data = {review['id']: review['comment_count']
+                for review in client.get(reviews_url).json()['results']}
+        assert data == {reviews[0]['id']: 2, reviews[1]['id']: 0}, (
+            'Проверьте, что отзывы содержат поле `comment_count`.'
+        )
+
+        create_single_comment(user_client, title_id, review_id, 'Еще')
+        response = client.get(f'{reviews_url}{review_id}/')
+        assert response.json()['comment_count'] == 3, (
+            'Проверьте, что новый комментарий увеличивает `comment_count`.'
+        )
+        response = admin_client.delete(
+            f'{reviews_url}{review_id}/comments/{comments[0]["id"]}/')
+        assert client.get(
+            f'{reviews_url}{review_id}/').json()['comment_count'] == 2
+
+        response = admin_client.delete(f'{reviews_url}{reviews[1]["id"]}/')
+        assert client.get(
+            f'/api/v1/titles/{title_id}/').json()['review_count'] == 1
+
+    def test_02_no_aggregates(self, client, admin_client, admin,
+                              user_client, user):
+        _, _, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client})
+        for url in ('/api/v1/titles/',
+                    f'/api/v1/titles/{titles[0]["id"]}/reviews/'):
+            _, queries = capture_queries(client, 'get', url)
+            assert not any('COUNT("reviews_' in query['sql']
+                           or 'GROUP BY' in query['sql']
+                           for query in queries), (
+                f'Проверьте, что счетчики в `{url}` не считаются '
+                'агрегатами при каждом запросе.'
+            )
+
+    def test_03_repair_counters(self, admin_client, admin, user_client,
+                                user):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client})
+        Review.objects.update(comment_count=10)
+        Title.objects.update(rating_count=0, rating_sum=0)
+        Comment.objects.filter(review_id=reviews[0]['id']).first().delete()
+
+        stdout = StringIO()
+        call_command('repair_counters', stdout=stdout)
+        assert 'comment counts of 2 reviews' in stdout.getvalue()
+        assert dict(Review.objects.values_list('pk', 'comment_count')) == {
+            reviews[0]['id']: 1, reviews[1]['id']: 0}, (
+            'Проверьте, что команда repair_counters восстанавливает '
+            '`comment_count`.'
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.rating_count == 2, (
+            'Проверьте, что команда repair_counters восстанавливает число '
+            'отзывов произведения.'
+        )
+
+    def test_04_comment_and_counter_commit_together(self, admin_client,
+                                                    admin):
+        _, reviews, _ = create_comments(admin_client, {admin: admin_client})
+        review = Review.objects.get(pk=reviews[0]['id'])
+
+        def fail(**kwargs):
+            raise DatabaseError('counter update failed')
+
+        for signal, change in (
+            (post_save, lambda: Comment.objects.create(
+                review=review, author=admin, text='Новый')),
+            (post_delete, lambda: Comment.objects.filter(
+                review=review).first().delete()),
+        ):
+            signal.connect(fail, sender=Comment)
+            try:
+                with pytest.raises(DatabaseError):
+                    change()
+            finally:
+                signal.disconnect(fail, sender=Comment)
+            assert Comment.objects.filter(review=review).count() == 1
+            assert Review.objects.get(pk=review.pk).comment_count == 1, (
+                'Проверьте, что комментарий и `comment_count` отзыва '
+                'сохраняются в одной транзакции.'
+            )
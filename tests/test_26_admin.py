@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+from reviews.models import Title
+
+from tests.utils import (capture_queries, create_comments, create_reviews,
+                         create_single_review, create_titles, format_queries)
+
+CHANGELISTS = (
+    '/admin/reviews/title/',
+    '/admin/reviews/review/',
+    '/admin/reviews/comment/',
+)
+
+
+@pytest.fixture
+def site_client(user_superuser):
+    client = Client()
+    client.force_login(user_superuser)
+    return client
+
+
+def add_titles(admin_client, count):
+    for idx in range(count):
+        admin_client.post('/api/v1/titles/', data={
+            'name': f'Произведение {idx}', 'year': 2000,
+            'genre': ['drama'], 'category': 'films',
+        })
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Admin:
+
+    def test_01_changelists_open(self, site_client, admin_client, admin,
+                                 user_client, user):
+        create_comments(admin_client, {admin: admin_client,
+                                       user: user_client})
+        for url in CHANGELISTS:
+            response = site_client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что страница `{url}` открывается в админке.'
+            )
+        response = site_client.get(
+            '/admin/reviews/review/?q=Терминатор')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что поиск отзывов по названию произведения в '
+            'админке не приводит к ошибке.'
+        )
+
+    def test_02_title_changelist_queries(self, site_client, admin_client):
+        create_titles(admin_client)
+        url = CHANGELISTS[0]
+        _, before = capture_queries(site_client, 'get', url)
+        add_titles(admin_client, 5)
+        response, after = capture_queries(site_client, 'get', url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(after) == len(before), (
+            f'Проверьте, что число запросов страницы `{url}` не зависит от '
+            'числа произведений на ней.\n' + format_queries(after)
+        )
+
+    def test_03_review_changelist_queries(self, site_client, admin_client,
+                                          admin, user_client, user):
+        url = CHANGELISTS[1]
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        _, before = capture_queries(site_client, 'get', url)
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 7)
+        create_single_review(user_client, titles[1]['id'], 'Отзыв', 3)
+        response, after = capture_queries(site_client, 'get', url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(after) == len(before), (
+            f'Проверьте, что число запросов страницы `{url}` не зависит от '
+            'числа отзывов на ней.\n' + format_queries(after)
+        )
+
+    def test_04_title_changelist_sorted_by_rating(self, site_client,
+                                                  admin_client):
+        create_titles(admin_client)
+        Title.objects.filter(name='Терминатор').update(
+            rating=3, rating_sum=11, rating_count=3)
+        Title.objects.filter(name='Крепкий орешек').update(
+            rating=9, rating_sum=9, rating_count=1)
+        response = site_client.get(f'{CHANGELISTS[0]}?o=-6')
+        assert response.status_code == HTTPStatus.OK
+        names = [title.name
+                 for title in response.context['cl'].result_list]
+        assert names[:2] == ['Крепкий орешек', 'Терминатор'], (
+            'Проверьте, что список произведений в админке сортируется по '
+            'рейтингу.'
+        )
+        cell = '<td class="field-get_rating">4</td>'
+        assert cell in response.content.decode(), (
+            'Проверьте, что админка показывает округленную среднюю оценку.'
+        )
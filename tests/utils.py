@@ -1,5 +1,8 @@
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +308,34 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def capture_queries(client, method, url, data=None, **extra):
+    """Выполняет запрос и возвращает ответ и выполненные SQL-запросы."""
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data, **extra)
+    return response, context.captured_queries
+
+
+def format_queries(queries):
+    """Перечисляет SQL-запросы для сообщения об ошибке."""
+    return '\n'.join(
+        f'{idx}. ({query["time"]} с) {query["sql"]}'
+        for idx, query in enumerate(queries, 1)
+    )
+
+
+def check_query_budget(queries, url, request_method, max_queries,
+                       max_time):
+    """Проверяет число и суммарное время SQL-запросов эндпоинта."""
+    assert len(queries) <= max_queries, (
+        f'Проверьте, что {request_method}-запрос к `{url}` выполняет не '
+        f'больше {max_queries} SQL-запросов. Сейчас {len(queries)}:\n'
+        f'{format_queries(queries)}'
+    )
+    total_time = sum(float(query['time']) for query in queries)
+    assert total_time <= max_time, (
+        f'Проверьте, что SQL-запросы при {request_method}-запросе к `{url}` '
+        f'выполняются быстрее {max_time} с. Сейчас {total_time:.3f} с:\n'
+        f'{format_queries(queries)}'
+    )